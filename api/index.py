@@ -5,6 +5,7 @@ Adapts Flask app for Vercel's serverless runtime.
 
 import sys
 import os
+from io import BytesIO
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,10 +18,6 @@ def handler(request, context):
     Vercel serverless function handler.
     Wraps Flask WSGI application.
     """
-    from werkzeug.wrappers import Request as WerkzeugRequest
-    from werkzeug.wrappers import Response as WerkzeugResponse
-    from io import BytesIO
-    
     # Convert Vercel request to WSGI environ
     environ = request.environ
     
@@ -5,8 +5,9 @@ Designed for Vercel serverless deployment with stateless architecture.
 
 import os
 import uuid
-import json
+import orjson
 import sqlite3
+import zlib
 import tempfile
 from datetime import datetime
 from pathlib import Path
@@ -14,29 +15,74 @@ from flask import Flask, request, jsonify, Response, send_file
 from flask import stream_with_context
 import threading
 import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Core modules
 from core.audio_processor import AudioBuffer
-from core.transcriber import OfflineTranscriber
+from core.transcriber import OfflineTranscriber, WhisperTranscriber
 from core.diarization import SpeakerDiarizer
 from core.qa_engine import QAProcessor
 from core.minutes_builder import MinutesBuilder
-from core.pdf_generator import PDFGenerator
+from core.pdf_generator import generate_pdf
 
 # Configuration
 DATABASE_PATH = os.environ.get('DATABASE_PATH', '/tmp/meetings.db')
-UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', '/tmp/audio_chunks')
 MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max audio chunk
+SSE_HEARTBEAT_SECONDS = 15
+# Background chunk-processing threads (0 = process inline, the default on Vercel)
+INGEST_WORKERS = int(os.environ.get(
+    'INGEST_WORKERS', 0 if os.environ.get('VERCEL') else (os.cpu_count() or 1)
+))
+# Run chunk analysis in forked worker processes instead of worker threads
+INGEST_PROCESSES = os.environ.get('INGEST_PROCESSES', '0') == '1'
+# Lay out minutes PDFs in a separate process (off by default on Vercel)
+PDF_PROCESS = os.environ.get(
+    'PDF_PROCESS', '0' if os.environ.get('VERCEL') else '1'
+) == '1'
+# Speech-to-text engine: 'vosk', or 'whisper' (needs faster-whisper installed)
+TRANSCRIBER_BACKEND = os.environ.get('TRANSCRIBER_BACKEND', 'vosk')
+
+# Process-local SSE subscribers: meeting_id -> list of wake-up queues
+_meeting_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+def subscribe(meeting_id):
+    """Register a queue that is notified when the meeting changes."""
+    q = queue.Queue()
+    with _subscribers_lock:
+        _meeting_subscribers.setdefault(meeting_id, []).append(q)
+    return q
+
+def unsubscribe(meeting_id, q):
+    """Remove a queue registered with subscribe()."""
+    with _subscribers_lock:
+        subscribers = _meeting_subscribers.get(meeting_id, [])
+        if q in subscribers:
+            subscribers.remove(q)
+        if not subscribers:
+            _meeting_subscribers.pop(meeting_id, None)
+
+def notify_subscribers(meeting_id):
+    """Wake every SSE stream watching the meeting."""
+    with _subscribers_lock:
+        subscribers = list(_meeting_subscribers.get(meeting_id, []))
+    for q in subscribers:
+        q.put_nowait(meeting_id)
 
 def get_db_connection():
     """Create database connection with row factory."""
     conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
+    # WAL journal (set in init_db) is durable enough without an fsync per commit
+    conn.execute('PRAGMA synchronous=NORMAL')
     return conn
 
 def init_db():
     """Initialize SQLite database with required tables."""
     conn = get_db_connection()
+    conn.execute('PRAGMA journal_mode=WAL')
     cursor = conn.cursor()
     
     # Meetings table
@@ -48,6 +94,8 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             ended_at TIMESTAMP,
             participant_count INTEGER DEFAULT 0,
+            -- Deprecated: transcript and Q&A used to be stored here as JSON;
+            -- init_db moves them to transcript_entries/qa_entries
             transcript TEXT DEFAULT '[]',
             qa_pairs TEXT DEFAULT '[]',
             decisions TEXT DEFAULT '[]',
@@ -56,61 +104,509 @@ def init_db():
         )
     ''')
     
-    # Audio chunks table (temporary storage)
+    # Speakers table
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS audio_chunks (
+        CREATE TABLE IF NOT EXISTS speakers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             meeting_id TEXT,
-            chunk_data BLOB,
+            speaker_id TEXT,
+            voice_fingerprint TEXT,
+            display_name TEXT,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (meeting_id) REFERENCES meetings(id)
+        )
+    ''')
+    
+    # Transcript entries (append-only, seq gives chronological order)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transcript_entries (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            meeting_id TEXT,
+            entry_id TEXT,
             timestamp REAL,
-            processed BOOLEAN DEFAULT 0,
+            speaker TEXT,
+            text TEXT,
+            is_question BOOLEAN DEFAULT 0,
             FOREIGN KEY (meeting_id) REFERENCES meetings(id)
         )
     ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transcript_meeting_seq
+        ON transcript_entries (meeting_id, seq)
+    ''')
     
-    # Speakers table
+    # Questions and the transcript entries that answer them
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS speakers (
+        CREATE TABLE IF NOT EXISTS qa_entries (
+            question_seq INTEGER PRIMARY KEY,
+            meeting_id TEXT,
+            resolved BOOLEAN DEFAULT 0,
+            FOREIGN KEY (meeting_id) REFERENCES meetings(id),
+            FOREIGN KEY (question_seq) REFERENCES transcript_entries(seq)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS qa_answers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             meeting_id TEXT,
-            speaker_id TEXT,
-            voice_fingerprint TEXT,
-            display_name TEXT,
-            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (meeting_id) REFERENCES meetings(id)
+            question_seq INTEGER,
+            answer_seq INTEGER,
+            FOREIGN KEY (question_seq) REFERENCES qa_entries(question_seq),
+            FOREIGN KEY (answer_seq) REFERENCES transcript_entries(seq)
         )
     ''')
     
+    _migrate_json_transcripts(cursor)
+    
     conn.commit()
     conn.close()
 
+def _migrate_json_transcripts(cursor):
+    """
+    Move transcripts and Q&A saved as JSON on the meetings row (before the
+    entry tables existed) into transcript_entries/qa_entries/qa_answers.
+    Migrated meetings have their JSON columns reset, so this runs once.
+    """
+    legacy = cursor.execute(
+        """SELECT id, transcript, qa_pairs FROM meetings
+           WHERE COALESCE(transcript, '[]') != '[]' OR COALESCE(qa_pairs, '[]') != '[]'"""
+    ).fetchall()
+    
+    for meeting_id, transcript, qa_pairs in legacy:
+        # Entry id -> seq, to point Q&A rows at the migrated entries
+        seqs = {}
+        for entry in orjson.loads(transcript or '[]'):
+            seq = cursor.execute(
+                '''INSERT INTO transcript_entries
+                   (meeting_id, entry_id, timestamp, speaker, text, is_question)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (
+                    meeting_id,
+                    entry.get('id') or str(uuid.uuid4()),
+                    entry.get('timestamp'),
+                    entry.get('speaker'),
+                    entry.get('text'),
+                    bool(entry.get('is_question'))
+                )
+            ).lastrowid
+            if entry.get('id'):
+                seqs[entry['id']] = seq
+        
+        for qa in orjson.loads(qa_pairs or '[]'):
+            question_seq = seqs.get((qa.get('question') or {}).get('id'))
+            if question_seq is None:
+                continue
+            cursor.execute(
+                'INSERT INTO qa_entries (question_seq, meeting_id, resolved) VALUES (?, ?, ?)',
+                (question_seq, meeting_id, bool(qa.get('resolved')))
+            )
+            for answer in qa.get('answers', []):
+                answer_seq = seqs.get(answer.get('id'))
+                if answer_seq is not None:
+                    cursor.execute(
+                        'INSERT INTO qa_answers (meeting_id, question_seq, answer_seq) VALUES (?, ?, ?)',
+                        (meeting_id, question_seq, answer_seq)
+                    )
+        
+        cursor.execute(
+            "UPDATE meetings SET transcript = '[]', qa_pairs = '[]' WHERE id = ?",
+            (meeting_id,)
+        )
+
+# Core components (lazy loading for serverless, shared by all app instances)
+_transcriber = None
+_diarizer = None
+_qa_engine = None
+_components_lock = threading.Lock()
+_ingest_queues = []
+_ingest_pid = None  # process the ingest threads were started in
+# Queued-but-unfinished chunks per meeting, so stop can wait for them
+_pending_chunks = {}
+_pending_done = threading.Condition()
+_pdf_pool = None
+
+def get_transcriber():
+    """Return the shared transcriber, loading the model on first use."""
+    global _transcriber
+    if _transcriber is None:
+        with _components_lock:
+            if _transcriber is None:
+                if TRANSCRIBER_BACKEND == 'whisper':
+                    _transcriber = WhisperTranscriber()
+                else:
+                    _transcriber = OfflineTranscriber()
+    return _transcriber
+
+def get_diarizer():
+    """Return the shared SpeakerDiarizer."""
+    global _diarizer
+    if _diarizer is None:
+        with _components_lock:
+            if _diarizer is None:
+                _diarizer = SpeakerDiarizer()
+    return _diarizer
+
+def get_qa_engine():
+    """Return the shared QAProcessor."""
+    global _qa_engine
+    if _qa_engine is None:
+        with _components_lock:
+            if _qa_engine is None:
+                _qa_engine = QAProcessor()
+    return _qa_engine
+
+def sse_event(payload):
+    """Encode a payload as a Server-Sent Events data frame (bytes)."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+def _row_to_entry(row):
+    """Convert a transcript_entries row to the transcript entry dict."""
+    return {
+        "timestamp": row['timestamp'],
+        "speaker": row['speaker'],
+        "text": row['text'],
+        "is_question": bool(row['is_question']),
+        "id": row['entry_id']
+    }
+
+def load_transcript(conn, meeting_id, after_seq=0):
+    """
+    Load transcript entries for a meeting in chronological order.
+    Returns (entries, last_seq) so callers can resume incrementally.
+    """
+    rows = conn.execute(
+        'SELECT * FROM transcript_entries WHERE meeting_id = ? AND seq > ? ORDER BY seq',
+        (meeting_id, after_seq)
+    ).fetchall()
+    last_seq = rows[-1]['seq'] if rows else after_seq
+    return [_row_to_entry(row) for row in rows], last_seq
+
+def load_qa_pairs(conn, meeting_id, after_seq=0):
+    """
+    Load Q&A pairs for questions asked after the given transcript seq.
+    """
+    questions = conn.execute(
+        '''SELECT q.question_seq, q.resolved, t.*
+           FROM qa_entries q JOIN transcript_entries t ON t.seq = q.question_seq
+           WHERE q.meeting_id = ? AND q.question_seq > ?
+           ORDER BY q.question_seq''',
+        (meeting_id, after_seq)
+    ).fetchall()
+    if not questions:
+        return []
+    
+    answers = {}
+    for row in conn.execute(
+        '''SELECT a.question_seq, t.*
+           FROM qa_answers a JOIN transcript_entries t ON t.seq = a.answer_seq
+           WHERE a.meeting_id = ? AND a.question_seq > ?
+           ORDER BY a.answer_seq''',
+        (meeting_id, after_seq)
+    ):
+        answers.setdefault(row['question_seq'], []).append(_row_to_entry(row))
+    
+    return [
+        {
+            "question": _row_to_entry(q),
+            "answers": answers.get(q['question_seq'], []),
+            "resolved": bool(q['resolved'])
+        } for q in questions
+    ]
+
+def analyze_audio_chunk(meeting_id, chunk_data):
+    """
+    CPU-heavy half of chunk processing: decode, diarize, transcribe, detect Q&A.
+    Touches no database, so it can run in an ingest worker process.
+    Returns (speaker_id, transcription, is_question, is_conclusive) or None.
+    """
+    # Initialize processors
+    transcriber = get_transcriber()
+    diarizer = get_diarizer()
+    qa_engine = get_qa_engine()
+    
+    # Decode audio straight from the uploaded bytes
+    audio, sr = AudioBuffer.convert_to_wav(chunk_data, target_sr=16000)
+    if audio is None:
+        return None
+    
+    # Speaker diarization
+    speaker_id = diarizer.identify_speaker(audio, sr, meeting_id)
+    
+    # Transcription; Vosk decodes 16-bit PCM and the float samples are not
+    # needed past diarization, so swap them before the decode rather than
+    # holding both. Whisper takes the float samples as they are.
+    if isinstance(transcriber, OfflineTranscriber):
+        audio = transcriber.to_int16(audio)
+    transcription = transcriber.transcribe(audio, sr)
+    
+    if not transcription or not transcription.strip():
+        return None
+    
+    # Detect if question
+    is_question = qa_engine.is_question(transcription)
+    is_conclusive = not is_question and qa_engine.is_conclusive_answer(transcription)
+    
+    return speaker_id, transcription, is_question, is_conclusive
+
+def process_audio_chunk(meeting_id, chunk_data, timestamp, executor=None):
+    """
+    Process single audio chunk: transcribe, diarize, detect Q&A.
+    Analysis runs in the given worker-process executor if any; database
+    writes always happen in this process.
+    """
+    try:
+        if executor is not None:
+            result = executor.submit(analyze_audio_chunk, meeting_id, chunk_data).result()
+        else:
+            result = analyze_audio_chunk(meeting_id, chunk_data)
+        
+        if result is None:
+            return
+        speaker_id, transcription, is_question, is_conclusive = result
+        
+        conn = get_db_connection()
+        # A chunk that arrives after the minutes were built is dropped
+        # rather than added to a completed meeting
+        meeting = conn.execute(
+            'SELECT status FROM meetings WHERE id = ?',
+            (meeting_id,)
+        ).fetchone()
+        if not meeting or meeting['status'] == 'completed':
+            conn.close()
+            return
+        
+        # Get or create speaker name
+        speaker_row = conn.execute(
+            'SELECT display_name FROM speakers WHERE meeting_id = ? AND speaker_id = ?',
+            (meeting_id, speaker_id)
+        ).fetchone()
+        
+        if speaker_row:
+            speaker_name = speaker_row['display_name']
+        else:
+            # New speaker
+            speaker_num = conn.execute(
+                'SELECT COUNT(*) FROM speakers WHERE meeting_id = ?',
+                (meeting_id,)
+            ).fetchone()[0] + 1
+            speaker_name = f"Participant {speaker_num}"
+            
+            conn.execute(
+                'INSERT INTO speakers (meeting_id, speaker_id, display_name) VALUES (?, ?, ?)',
+                (meeting_id, speaker_id, speaker_name)
+            )
+            
+            # Update participant count
+            conn.execute(
+                'UPDATE meetings SET participant_count = ? WHERE id = ?',
+                (speaker_num, meeting_id)
+            )
+        
+        # Append to transcript
+        entry_id = str(uuid.uuid4())
+        seq = conn.execute(
+            '''INSERT INTO transcript_entries
+               (meeting_id, entry_id, timestamp, speaker, text, is_question)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (meeting_id, entry_id, timestamp, speaker_name, transcription, is_question)
+        ).lastrowid
+        
+        # Q&A processing
+        if is_question:
+            conn.execute(
+                'INSERT INTO qa_entries (question_seq, meeting_id) VALUES (?, ?)',
+                (seq, meeting_id)
+            )
+        else:
+            # Link to most recent unresolved question
+            open_question = conn.execute(
+                '''SELECT question_seq FROM qa_entries
+                   WHERE meeting_id = ? AND resolved = 0
+                   ORDER BY question_seq DESC LIMIT 1''',
+                (meeting_id,)
+            ).fetchone()
+            if open_question:
+                conn.execute(
+                    'INSERT INTO qa_answers (meeting_id, question_seq, answer_seq) VALUES (?, ?, ?)',
+                    (meeting_id, open_question['question_seq'], seq)
+                )
+                # Auto-resolve if statement looks conclusive
+                if is_conclusive:
+                    conn.execute(
+                        'UPDATE qa_entries SET resolved = 1 WHERE question_seq = ?',
+                        (open_question['question_seq'],)
+                    )
+        
+        conn.commit()
+        conn.close()
+        
+        notify_subscribers(meeting_id)
+    
+    except BrokenProcessPool:
+        # The worker process died; the caller owns the executor and rebuilds it
+        raise
+    except Exception as e:
+        print(f"Error processing chunk: {e}")
+
+def _init_ingest_process():
+    """Load models once in each ingest worker process."""
+    global _components_lock
+    # A lock inherited through fork may have been held by another thread
+    _components_lock = threading.Lock()
+    get_transcriber()
+    get_diarizer()
+    get_qa_engine()
+
+def _new_ingest_executor(start_method):
+    """Single-process pool that analyzes one worker's chunks, already running."""
+    executor = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_ingest_process
+    )
+    # The pool only starts its process on the first submit; do it now
+    executor.submit(int).result()
+    return executor
+
+def _ingest_worker(jobs, executor=None):
+    """Process queued audio chunks until the process exits."""
+    while True:
+        meeting_id, chunk_data, timestamp = jobs.get()
+        try:
+            process_audio_chunk(meeting_id, chunk_data, timestamp, executor)
+        except BrokenProcessPool:
+            # The analysis process was killed (e.g. by the OOM killer); this
+            # chunk is lost, but later ones get a fresh process
+            print("Ingest worker process died, restarting it")
+            executor.shutdown(wait=False)
+            try:
+                # Threads are running now, so do not fork this process again
+                executor = _new_ingest_executor('forkserver')
+            except Exception as e:
+                # Keep the shard alive by analyzing in this thread instead
+                print(f"Could not restart ingest worker process: {e}")
+                executor = None
+        finally:
+            with _pending_done:
+                _pending_chunks[meeting_id] -= 1
+                if not _pending_chunks[meeting_id]:
+                    del _pending_chunks[meeting_id]
+                    _pending_done.notify_all()
+            jobs.task_done()
+
+def start_ingest_workers(n_workers=INGEST_WORKERS, use_processes=INGEST_PROCESSES):
+    """
+    Start background threads that process uploaded chunks.
+    Each meeting is pinned to one worker so its chunks stay in order.
+    With use_processes, every worker thread hands analysis to its own
+    forked single-process pool, so chunks run on separate cores without
+    contending for the GIL; diarizer state stays consistent because a
+    meeting always lands in the same process.
+    """
+    global _ingest_pid
+    if n_workers <= 0 or multiprocessing.parent_process() is not None:
+        # A forkserver-started worker imports this module too; it must not
+        # start workers of its own
+        return
+    if use_processes:
+        # Load the models before any worker forks so every process shares
+        # one copy-on-write model instead of loading its own
+        get_transcriber()
+        get_diarizer()
+        get_qa_engine()
+    
+    with _components_lock:
+        if _ingest_pid == os.getpid():
+            return
+        # Threads do not survive fork (e.g. gunicorn --preload), so queues
+        # inherited from a parent have no consumer here; start afresh
+        _ingest_queues.clear()
+        _ingest_pid = os.getpid()
+        # Fork (sharing the loaded models) only if no other thread is
+        # running yet: a child forked mid-way through another thread's
+        # critical section inherits its locks held forever. Otherwise, e.g.
+        # restarting in a forked server process that is already serving
+        # requests, start from the forkserver and load models per process.
+        start_method = 'fork' if threading.active_count() == 1 else 'forkserver'
+        # Start every worker process before the first worker thread
+        executors = [
+            _new_ingest_executor(start_method) if use_processes else None
+            for _ in range(n_workers)
+        ]
+        for executor in executors:
+            jobs = queue.Queue()
+            threading.Thread(target=_ingest_worker, args=(jobs, executor), daemon=True).start()
+            _ingest_queues.append(jobs)
+
+def enqueue_audio_chunk(meeting_id, chunk_data, timestamp):
+    """
+    Queue a chunk for background processing.
+    Returns False when no workers are running (caller processes inline).
+    """
+    if _ingest_pid != os.getpid():
+        start_ingest_workers()
+    if not _ingest_queues:
+        return False
+    shard = zlib.crc32(meeting_id.encode()) % len(_ingest_queues)
+    with _pending_done:
+        _pending_chunks[meeting_id] = _pending_chunks.get(meeting_id, 0) + 1
+    _ingest_queues[shard].put((meeting_id, chunk_data, timestamp))
+    return True
+
+def wait_for_chunks(meeting_id):
+    """Block until every chunk queued for the meeting has been processed."""
+    with _pending_done:
+        _pending_done.wait_for(lambda: meeting_id not in _pending_chunks)
+
+def _get_pdf_pool():
+    """
+    Return the long-lived PDF process pool, starting it on first use.
+    Its worker comes from a forkserver rather than a fork of this
+    multi-threaded server, so it cannot inherit a lock held by an ingest
+    or SSE thread; the server preloads only the PDF module, not the app.
+    """
+    global _pdf_pool
+    with _components_lock:
+        if _pdf_pool is None:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['core.pdf_generator'])
+            _pdf_pool = ProcessPoolExecutor(max_workers=1, mp_context=context)
+    return _pdf_pool
+
+def generate_minutes_pdf(use_process=PDF_PROCESS, **kwargs):
+    """
+    Render the minutes PDF.
+    ReportLab layout is pure-Python CPU work that holds the GIL for the whole
+    build, stalling ingest threads and SSE streams; with use_process it runs
+    in the PDF pool's process instead.
+    """
+    global _pdf_pool
+    if not use_process:
+        generate_pdf(**kwargs)
+        return
+    pool = _get_pdf_pool()
+    try:
+        pool.submit(generate_pdf, **kwargs).result()
+    except BrokenProcessPool:
+        # The worker died mid-build; start a new pool next time, and still
+        # deliver this PDF
+        with _components_lock:
+            if _pdf_pool is pool:
+                _pdf_pool = None
+        generate_pdf(**kwargs)
+
 def create_app():
     """Application factory pattern for Flask."""
     app = Flask(__name__)
     app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
     
-    # Ensure temp directories exist
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    # Ensure database directory exists
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
     
     # Initialize database
     init_db()
     
-    # Initialize core components (lazy loading for serverless)
-    transcriber = None
-    diarizer = None
-    
-    def get_transcriber():
-        nonlocal transcriber
-        if transcriber is None:
-            transcriber = OfflineTranscriber()
-        return transcriber
-    
-    def get_diarizer():
-        nonlocal diarizer
-        if diarizer is None:
-            diarizer = SpeakerDiarizer()
-        return diarizer
+    start_ingest_workers()
     
     @app.route('/api/health')
     def health_check():
@@ -154,25 +650,19 @@ def create_app():
         audio_file = request.files['audio']
         timestamp = float(request.form.get('timestamp', datetime.now().timestamp()))
         
-        # Save chunk temporarily
-        chunk_path = os.path.join(UPLOAD_FOLDER, f"{meeting_id}_{timestamp}.webm")
-        audio_file.save(chunk_path)
-        
-        # Store in database for processing
-        conn = get_db_connection()
-        with open(chunk_path, 'rb') as f:
-            chunk_data = f.read()
+        # Read the upload once from werkzeug's buffer; it never touches disk
+        chunk_data = audio_file.stream.read()
         
-        conn.execute(
-            'INSERT INTO audio_chunks (meeting_id, chunk_data, timestamp) VALUES (?, ?, ?)',
-            (meeting_id, chunk_data, timestamp)
-        )
-        conn.commit()
-        conn.close()
+        # Hand off to a background worker; on Vercel serverless (no workers)
+        # process synchronously since the instance may freeze after responding
+        if enqueue_audio_chunk(meeting_id, chunk_data, timestamp):
+            return jsonify({
+                "status": "queued",
+                "timestamp": timestamp,
+                "meeting_id": meeting_id
+            }), 202
         
-        # Trigger immediate processing (Vercel serverless - process synchronously)
-        # In production, this would be a background job
-        process_audio_chunk(meeting_id, chunk_path, timestamp)
+        process_audio_chunk(meeting_id, chunk_data, timestamp)
         
         return jsonify({
             "status": "received",
@@ -180,121 +670,6 @@ def create_app():
             "meeting_id": meeting_id
         })
     
-    def process_audio_chunk(meeting_id, chunk_path, timestamp):
-        """
-        Process single audio chunk: transcribe, diarize, detect Q&A.
-        Stateless processing suitable for serverless.
-        """
-        try:
-            # Initialize processors
-            transcriber = get_transcriber()
-            diarizer = get_diarizer()
-            qa_engine = QAProcessor()
-            
-            # Load audio
-            import librosa
-            audio, sr = librosa.load(chunk_path, sr=16000, mono=True)
-            
-            # Speaker diarization
-            speaker_id = diarizer.identify_speaker(audio, sr, meeting_id)
-            
-            # Transcription
-            transcription = transcriber.transcribe(audio, sr)
-            
-            if not transcription or not transcription.strip():
-                return
-            
-            # Detect if question
-            is_question = qa_engine.is_question(transcription)
-            
-            # Get or create speaker name
-            conn = get_db_connection()
-            speaker_row = conn.execute(
-                'SELECT display_name FROM speakers WHERE meeting_id = ? AND speaker_id = ?',
-                (meeting_id, speaker_id)
-            ).fetchone()
-            
-            if speaker_row:
-                speaker_name = speaker_row['display_name']
-            else:
-                # New speaker
-                speaker_num = conn.execute(
-                    'SELECT COUNT(*) FROM speakers WHERE meeting_id = ?',
-                    (meeting_id,)
-                ).fetchone()[0] + 1
-                speaker_name = f"Participant {speaker_num}"
-                
-                conn.execute(
-                    'INSERT INTO speakers (meeting_id, speaker_id, display_name) VALUES (?, ?, ?)',
-                    (meeting_id, speaker_id, speaker_name)
-                )
-                
-                # Update participant count
-                conn.execute(
-                    'UPDATE meetings SET participant_count = ? WHERE id = ?',
-                    (speaker_num, meeting_id)
-                )
-            
-            # Get current transcript
-            meeting = conn.execute(
-                'SELECT transcript, qa_pairs FROM meetings WHERE id = ?',
-                (meeting_id,)
-            ).fetchone()
-            
-            transcript = json.loads(meeting['transcript'])
-            qa_pairs = json.loads(meeting['qa_pairs'])
-            
-            # Add to transcript
-            entry = {
-                "timestamp": timestamp,
-                "speaker": speaker_name,
-                "text": transcription,
-                "is_question": is_question,
-                "id": str(uuid.uuid4())
-            }
-            transcript.append(entry)
-            
-            # Q&A processing
-            if is_question:
-                qa_pairs.append({
-                    "question": entry,
-                    "answers": [],
-                    "resolved": False
-                })
-            else:
-                # Link to most recent unresolved question
-                for qa in reversed(qa_pairs):
-                    if not qa.get('resolved', False):
-                        qa['answers'].append(entry)
-                        # Auto-resolve if statement looks conclusive
-                        if qa_engine.is_conclusive_answer(transcription):
-                            qa['resolved'] = True
-                        break
-            
-            # Update database
-            conn.execute(
-                'UPDATE meetings SET transcript = ?, qa_pairs = ? WHERE id = ?',
-                (json.dumps(transcript), json.dumps(qa_pairs), meeting_id)
-            )
-            
-            # Mark chunk as processed
-            conn.execute(
-                'UPDATE audio_chunks SET processed = 1 WHERE meeting_id = ? AND timestamp = ?',
-                (meeting_id, timestamp)
-            )
-            
-            conn.commit()
-            conn.close()
-            
-            # Cleanup temp file
-            os.remove(chunk_path)
-            
-        except Exception as e:
-            print(f"Error processing chunk: {e}")
-            # Ensure cleanup
-            if os.path.exists(chunk_path):
-                os.remove(chunk_path)
-    
     @app.route('/api/meetings/<meeting_id>/stream')
     def stream_minutes(meeting_id):
         """
@@ -302,55 +677,61 @@ def create_app():
         Sends incremental updates to frontend.
         """
         def event_stream():
-            last_transcript_len = 0
-            last_qa_len = 0
+            last_seq = 0
+            updates = subscribe(meeting_id)
             
-            while True:
-                try:
-                    conn = get_db_connection()
-                    meeting = conn.execute(
-                        'SELECT transcript, qa_pairs, status, participant_count FROM meetings WHERE id = ?',
-                        (meeting_id,)
-                    ).fetchone()
-                    conn.close()
-                    
-                    if not meeting:
-                        yield f"data: {json.dumps({'error': 'Meeting not found'})}\n\n"
-                        break
-                    
-                    transcript = json.loads(meeting['transcript'])
-                    qa_pairs = json.loads(meeting['qa_pairs'])
-                    
-                    # Only send if new content
-                    if len(transcript) > last_transcript_len or len(qa_pairs) > last_qa_len:
-                        new_entries = transcript[last_transcript_len:]
-                        new_qa = qa_pairs[last_qa_len:]
+            try:
+                while True:
+                    try:
+                        conn = get_db_connection()
+                        meeting = conn.execute(
+                            'SELECT status, participant_count FROM meetings WHERE id = ?',
+                            (meeting_id,)
+                        ).fetchone()
+                        
+                        if not meeting:
+                            conn.close()
+                            yield sse_event({'error': 'Meeting not found'})
+                            break
                         
-                        data = {
-                            "transcript": new_entries,
-                            "qa_pairs": new_qa,
-                            "total_speakers": meeting['participant_count'],
-                            "status": meeting['status'],
-                            "timestamp": datetime.now().isoformat()
-                        }
+                        # Only fetch entries added since the last update
+                        new_entries, seq = load_transcript(conn, meeting_id, last_seq)
+                        new_qa = load_qa_pairs(conn, meeting_id, last_seq) if new_entries else []
+                        conn.close()
                         
-                        yield f"data: {json.dumps(data)}\n\n"
+                        if new_entries:
+                            data = {
+                                "transcript": new_entries,
+                                "qa_pairs": new_qa,
+                                "total_speakers": meeting['participant_count'],
+                                "status": meeting['status'],
+                                "timestamp": datetime.now().isoformat()
+                            }
+                            
+                            yield sse_event(data)
+                            
+                            last_seq = seq
                         
-                        last_transcript_len = len(transcript)
-                        last_qa_len = len(qa_pairs)
-                    
-                    # If meeting ended, send final update and close
-                    if meeting['status'] == 'completed':
-                        yield f"data: {json.dumps({'status': 'completed', 'redirect': f'/api/meetings/{meeting_id}/pdf'})}\n\n"
+                        # If meeting ended, send final update and close
+                        if meeting['status'] == 'completed':
+                            yield sse_event({'status': 'completed', 'redirect': f'/api/meetings/{meeting_id}/pdf'})
+                            break
+                        
+                        # Block until a chunk lands; the timeout doubles as a
+                        # heartbeat and re-checks the DB for updates made by
+                        # other processes (e.g. separate serverless instances)
+                        try:
+                            updates.get(timeout=SSE_HEARTBEAT_SECONDS)
+                            while not updates.empty():
+                                updates.get_nowait()
+                        except queue.Empty:
+                            yield b": heartbeat\n\n"
+                        
+                    except Exception as e:
+                        yield sse_event({'error': str(e)})
                         break
-                    
-                    # Sleep to prevent tight loop (serverless-friendly)
-                    import time
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                    break
+            finally:
+                unsubscribe(meeting_id, updates)
         
         return Response(
             stream_with_context(event_stream()),
@@ -372,17 +753,21 @@ def create_app():
             'SELECT * FROM meetings WHERE id = ?',
             (meeting_id,)
         ).fetchone()
-        conn.close()
         
         if not meeting:
+            conn.close()
             return jsonify({"error": "Meeting not found"}), 404
         
+        transcript, _ = load_transcript(conn, meeting_id)
+        qa_pairs = load_qa_pairs(conn, meeting_id)
+        conn.close()
+        
         minutes_builder = MinutesBuilder()
         structured = minutes_builder.build_minutes(
-            json.loads(meeting['transcript']),
-            json.loads(meeting['qa_pairs']),
-            json.loads(meeting.get('decisions', '[]')),
-            json.loads(meeting.get('action_items', '[]'))
+            transcript,
+            qa_pairs,
+            orjson.loads(meeting['decisions'] or '[]'),
+            orjson.loads(meeting['action_items'] or '[]')
         )
         
         return jsonify({
@@ -410,11 +795,18 @@ def create_app():
             conn.close()
             return jsonify({"error": "Meeting not found"}), 404
         
+        # Chunks uploaded before stop may still be queued; they belong in
+        # the minutes
+        wait_for_chunks(meeting_id)
+        
+        transcript, _ = load_transcript(conn, meeting_id)
+        qa_pairs = load_qa_pairs(conn, meeting_id)
+        
         # Generate final minutes structure
         minutes_builder = MinutesBuilder()
         structured_minutes = minutes_builder.build_minutes(
-            json.loads(meeting['transcript']),
-            json.loads(meeting['qa_pairs']),
+            transcript,
+            qa_pairs,
             [],  # Decisions extracted by builder
             []   # Action items extracted by builder
         )
@@ -425,25 +817,25 @@ def create_app():
             (
                 'completed',
                 datetime.now().isoformat(),
-                json.dumps(structured_minutes.get('decisions', [])),
-                json.dumps(structured_minutes.get('action_items', [])),
+                orjson.dumps(structured_minutes.get('decisions', [])).decode(),
+                orjson.dumps(structured_minutes.get('action_items', [])).decode(),
                 meeting_id
             )
         )
         conn.commit()
         
         # Generate PDF
-        pdf_gen = PDFGenerator()
         pdf_path = os.path.join('/tmp', f'meeting_{meeting_id}.pdf')
-        pdf_gen.generate(
+        generate_minutes_pdf(
             meeting_title=meeting['title'],
             meeting_date=meeting['created_at'],
             participants=[f"Participant {i+1}" for i in range(meeting['participant_count'])],
-            transcript=json.loads(meeting['transcript']),
-            qa_pairs=json.loads(meeting['qa_pairs']),
+            transcript=transcript,
+            qa_pairs=qa_pairs,
             decisions=structured_minutes.get('decisions', []),
             action_items=structured_minutes.get('action_items', []),
-            output_path=pdf_path
+            output_path=pdf_path,
+            duration_minutes=structured_minutes['summary'].get('duration_minutes')
         )
         
         conn.execute(
@@ -453,6 +845,8 @@ def create_app():
         conn.commit()
         conn.close()
         
+        notify_subscribers(meeting_id)
+        
         return jsonify({
             "status": "completed",
             "meeting_id": meeting_id,
@@ -6,6 +6,7 @@ Handles audio chunking, buffering, and format conversion.
 import numpy as np
 import librosa
 import io
+import subprocess
 from pathlib import Path
 
 class AudioBuffer:
@@ -18,60 +19,107 @@ class AudioBuffer:
         self.sample_rate = sample_rate
         self.chunk_duration = chunk_duration
         self.overlap = overlap
-        self.buffer = np.array([], dtype=np.float32)
         self.chunk_samples = int(chunk_duration * sample_rate)
         self.overlap_samples = int(overlap * sample_rate)
+        # Preallocated storage; pending audio lives in [_read_idx, _write_idx)
+        self._ring = np.empty(self.chunk_samples * 4, dtype=np.float32)
+        self._read_idx = 0
+        self._write_idx = 0
+    
+    @property
+    def buffer(self):
+        """Pending (not yet emitted) audio samples."""
+        return self._ring[self._read_idx:self._write_idx]
+    
+    def _reserve(self, n):
+        """Make room for n more samples, compacting or growing storage."""
+        pending = self._write_idx - self._read_idx
+        if pending + n > len(self._ring):
+            ring = np.empty(max(2 * len(self._ring), pending + n), dtype=np.float32)
+            ring[:pending] = self._ring[self._read_idx:self._write_idx]
+            self._ring = ring
+        else:
+            self._ring[:pending] = self._ring[self._read_idx:self._write_idx]
+        self._read_idx = 0
+        self._write_idx = pending
     
     def add_audio(self, audio_data):
         """
         Add new audio data to buffer.
         Returns complete chunks when available.
         """
-        self.buffer = np.concatenate([self.buffer, audio_data])
+        n = len(audio_data)
+        if self._write_idx + n > len(self._ring):
+            self._reserve(n)
+        self._ring[self._write_idx:self._write_idx + n] = audio_data
+        self._write_idx += n
         
         chunks = []
-        while len(self.buffer) >= self.chunk_samples:
-            chunk = self.buffer[:self.chunk_samples]
-            chunks.append(chunk)
+        while self._write_idx - self._read_idx >= self.chunk_samples:
+            start = self._read_idx
+            chunks.append(self._ring[start:start + self.chunk_samples].copy())
             # Keep overlap for continuity
-            self.buffer = self.buffer[self.chunk_samples - self.overlap_samples:]
+            self._read_idx += self.chunk_samples - self.overlap_samples
         
         return chunks
     
     def flush(self):
         """Return remaining buffer content."""
         remaining = self.buffer.copy()
-        self.buffer = np.array([], dtype=np.float32)
+        self._read_idx = 0
+        self._write_idx = 0
         return remaining if len(remaining) > self.sample_rate * 0.5 else None
     
     @staticmethod
     def convert_to_wav(webm_data, target_sr=16000):
         """
         Convert WebM/OGG audio from browser to WAV format.
-        Uses librosa for robust format handling.
+        Pipes the bytes through ffmpeg; falls back to librosa when
+        ffmpeg is not installed.
         """
         try:
-            # Load audio from bytes
-            audio, sr = librosa.load(
-                io.BytesIO(webm_data),
-                sr=target_sr,
-                mono=True,
-                dtype=np.float32
-            )
+            try:
+                audio = AudioBuffer._decode_with_ffmpeg(webm_data, target_sr)
+            except FileNotFoundError:
+                # Load audio from bytes
+                audio, _ = librosa.load(
+                    io.BytesIO(webm_data),
+                    sr=target_sr,
+                    mono=True,
+                    dtype=np.float32
+                )
             return audio, target_sr
         except Exception as e:
             print(f"Audio conversion error: {e}")
             return None, None
     
+    @staticmethod
+    def _decode_with_ffmpeg(data, target_sr):
+        """Decode encoded audio bytes to mono float32 via an ffmpeg pipe."""
+        proc = subprocess.run(
+            [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-i', 'pipe:0',
+                '-f', 's16le', '-ac', '1', '-ar', str(target_sr),
+                'pipe:1'
+            ],
+            input=data,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+        return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+    
     @staticmethod
     def normalize_audio(audio):
         """Normalize audio to [-1, 1] range."""
         if audio is None or len(audio) == 0:
             return audio
         
-        max_val = np.max(np.abs(audio))
+        # Peak magnitude without materialising np.abs(audio)
+        max_val = max(float(audio.max()), -float(audio.min()))
         if max_val > 0:
-            return audio / max_val
+            return audio * (1.0 / max_val)
         return audio
     
     @staticmethod
@@ -86,22 +134,18 @@ class AudioBuffer:
         # Find non-silent regions
         non_silent = energy > threshold
         
-        # Find segments
-        segments = []
-        start = None
-        
-        for i, is_active in enumerate(non_silent):
-            if is_active and start is None:
-                start = i
-            elif not is_active and start is not None:
-                if (i - start) / 16000 >= min_length:  # min_length in seconds
-                    segments.append(audio[start:i])
-                start = None
+        # Find segment boundaries from rising/falling edges of the mask
+        edges = np.diff(non_silent.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
         
-        # Handle trailing segment
-        if start is not None and (len(audio) - start) / 16000 >= min_length:
-            segments.append(audio[start:])
+        # Keep segments of at least min_length seconds
+        keep = (ends - starts) >= min_length * 16000
+        if not keep.any():
+            return np.array([], dtype=np.float32)
         
-        if segments:
-            return np.concatenate(segments)
-        return np.array([], dtype=np.float32)
\ No newline at end of file
+        # Mark kept spans in a sample mask and gather them in one allocation
+        marks = np.zeros(len(audio) + 1, dtype=np.int32)
+        marks[starts[keep]] += 1
+        marks[ends[keep]] -= 1
+        return audio[np.cumsum(marks[:-1]) > 0]
\ No newline at end of file
@@ -5,8 +5,7 @@ Offline processing, no enrollment required.
 
 import numpy as np
 import librosa
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.preprocessing import StandardScaler
+from scipy.cluster.hierarchy import linkage, fcluster
 import hashlib
 import json
 import sqlite3
@@ -17,61 +16,95 @@ class SpeakerDiarizer:
     Maintains speaker consistency across chunks.
     """
     
-    def __init__(self, n_clusters=None, threshold=0.85):
+    def __init__(self, n_clusters=None, threshold=0.85, max_references=5, recency_weight=0.5):
         self.n_clusters = n_clusters
         self.threshold = threshold
-        self.scaler = StandardScaler()
-        self.speaker_embeddings = {}  # meeting_id -> {speaker_id: embedding}
+        self.max_references = max_references  # reference embeddings kept per speaker
+        self.recency_weight = recency_weight
+        self.speaker_ids = {}  # meeting_id -> [speaker_id, ...]
+        # Embeddings are stored as float16 and upcast only for the similarity matmul
+        self.speaker_embeddings = {}  # meeting_id -> (S, D) float16 matrix of unit-norm centers
+        self.speaker_references = {}  # meeting_id -> {speaker_id: [(embedding, duration, seq)]}
+        self.segment_counts = {}  # meeting_id -> segments seen so far
     
     def extract_features(self, audio, sr=16000):
         """
         Extract voice features for speaker identification.
         Uses MFCCs, spectral features, and prosody.
         """
-        # Ensure minimum length
-        if len(audio) < sr * 0.5:  # At least 0.5 seconds
-            return None
-        
-        features = []
+        features, valid = self.extract_features_batch([audio], sr)
+        return features[0] if valid else None
+    
+    def extract_features_batch(self, segments, sr=16000, batch_size=32):
+        """
+        Extract voice features for several segments at once.
+        Segments are zero-padded to a common length and run through one
+        batched STFT; per-frame statistics only cover each segment's own
+        frames. Returns (features, valid) where valid lists the indices of
+        segments long enough to use (at least 0.5 seconds).
+        """
+        valid = [i for i, seg in enumerate(segments) if len(seg) >= sr * 0.5]
+        blocks = [
+            self._extract_block([segments[i] for i in valid[start:start + batch_size]], sr)
+            for start in range(0, len(valid), batch_size)
+        ]
+        if not blocks:
+            return np.empty((0, 0)), valid
+        return np.vstack(blocks), valid
+    
+    def _extract_block(self, segments, sr):
+        """Feature matrix (B, D) for one padded batch of segments."""
+        hop_length = 512
+        lengths = np.array([len(seg) for seg in segments])
+        batch = np.zeros((len(segments), lengths.max()), dtype=np.float32)
+        for row, seg in enumerate(segments):
+            batch[row, :len(seg)] = seg
+        
+        # Single magnitude spectrogram shared by all spectral features
+        S = np.abs(librosa.stft(batch, n_fft=2048, hop_length=hop_length))
+        
+        # Mask of real (non-padding) frames per segment
+        n_frames = 1 + lengths // hop_length
+        mask = np.arange(S.shape[-1]) < n_frames[:, None]
+        
+        def frame_stats(values):
+            """Masked mean and variance over the frame axis."""
+            m = mask.reshape(mask.shape[0], *([1] * (values.ndim - 2)), -1)
+            count = n_frames.reshape(-1, *([1] * (values.ndim - 2)))
+            mean = np.sum(values * m, axis=-1) / count
+            var = np.sum(((values - mean[..., None]) ** 2) * m, axis=-1) / count
+            return mean, var
+        
+        columns = []
         
         # MFCCs (Mel-frequency cepstral coefficients)
-        mfccs = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=20)
-        mfcc_means = np.mean(mfccs, axis=1)
-        mfcc_vars = np.var(mfccs, axis=1)
-        features.extend(mfcc_means)
-        features.extend(mfcc_vars)
-        
-        # Spectral features
-        spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=audio, sr=sr)[0]
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=audio, sr=sr)[0]
-        
-        features.append(np.mean(spectral_centroids))
-        features.append(np.var(spectral_centroids))
-        features.append(np.mean(spectral_rolloff))
-        features.append(np.var(spectral_rolloff))
-        features.append(np.mean(spectral_bandwidth))
-        features.append(np.var(spectral_bandwidth))
-        
-        # Zero crossing rate (voice activity)
-        zcr = librosa.feature.zero_crossing_rate(audio)[0]
-        features.append(np.mean(zcr))
-        features.append(np.var(zcr))
-        
-        # RMS energy (loudness)
-        rms = librosa.feature.rms(y=audio)[0]
-        features.append(np.mean(rms))
-        features.append(np.var(rms))
+        mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr)
+        mfccs = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=20)
+        mfcc_means, mfcc_vars = frame_stats(mfccs)
+        columns.extend([mfcc_means, mfcc_vars])
+        
+        # Spectral features, zero crossing rate (voice activity), RMS energy (loudness)
+        for values in (
+            librosa.feature.spectral_centroid(S=S, sr=sr),
+            librosa.feature.spectral_rolloff(S=S, sr=sr),
+            librosa.feature.spectral_bandwidth(S=S, sr=sr),
+            librosa.feature.zero_crossing_rate(batch, hop_length=hop_length),
+            librosa.feature.rms(S=S, frame_length=2048),
+        ):
+            mean, var = frame_stats(values[:, 0, :])
+            columns.append(np.stack([mean, var], axis=1))
         
         # Pitch (fundamental frequency)
-        pitches, magnitudes = librosa.piptrack(y=audio, sr=sr)
-        pitch_mean = np.mean(pitches[magnitudes > np.max(magnitudes) * 0.5])
-        if not np.isnan(pitch_mean):
-            features.append(pitch_mean)
-        else:
-            features.append(0)
-        
-        return np.array(features)
+        pitches, magnitudes = librosa.piptrack(S=S, sr=sr)
+        pitch_means = np.zeros((len(segments), 1))
+        for row in range(len(segments)):
+            mags = magnitudes[row][:, mask[row]]
+            voiced = pitches[row][:, mask[row]][mags > np.max(mags) * 0.5]
+            if voiced.size:
+                pitch_means[row, 0] = np.mean(voiced)
+        columns.append(pitch_means)
+        
+        return np.hstack(columns)
     
     def identify_speaker(self, audio, sr, meeting_id):
         """
@@ -82,85 +115,97 @@ class SpeakerDiarizer:
         if features is None:
             return "unknown"
         
-        # Normalize features
-        features = features.reshape(1, -1)
-        
-        # Get existing speakers for this meeting
-        if meeting_id not in self.speaker_embeddings:
-            self.speaker_embeddings[meeting_id] = {}
-        
-        existing_speakers = self.speaker_embeddings[meeting_id]
-        
-        if not existing_speakers:
-            # First speaker
-            speaker_id = self._generate_speaker_id(features)
-            self.speaker_embeddings[meeting_id][speaker_id] = features
-            return speaker_id
-        
-        # Compare with existing speakers
-        best_match = None
-        best_score = -1
-        
-        for speaker_id, embedding in existing_speakers.items():
-            similarity = self._cosine_similarity(features, embedding)
-            if similarity > best_score:
-                best_score = similarity
-                best_match = speaker_id
-        
-        # If similar enough, return existing speaker
-        if best_score > self.threshold:
-            # Update embedding with moving average
-            self.speaker_embeddings[meeting_id][best_match] = (
-                0.8 * self.speaker_embeddings[meeting_id][best_match] + 
-                0.2 * features
-            )
-            return best_match
+        speaker_ids = self.speaker_ids.setdefault(meeting_id, [])
+        references = self.speaker_references.setdefault(meeting_id, {})
+        seq = self.segment_counts.get(meeting_id, 0) + 1
+        self.segment_counts[meeting_id] = seq
+        query = self._normalize(features)
+        reference = (query.astype(np.float16), len(audio) / sr, seq)
+        
+        if speaker_ids:
+            # Cosine similarity against every speaker center in one matmul
+            embeddings = self.speaker_embeddings[meeting_id]
+            similarities = embeddings.astype(np.float32) @ query
+            best = int(np.argmax(similarities))
+            
+            # If similar enough, return existing speaker
+            if similarities[best] > self.threshold:
+                speaker_id = speaker_ids[best]
+                references[speaker_id] = self._select_references(
+                    references[speaker_id] + [reference], seq
+                )
+                embeddings[best] = self._center(references[speaker_id])
+                return speaker_id
         
         # New speaker
         new_speaker_id = self._generate_speaker_id(features)
-        self.speaker_embeddings[meeting_id][new_speaker_id] = features
+        speaker_ids.append(new_speaker_id)
+        references[new_speaker_id] = [reference]
+        if meeting_id in self.speaker_embeddings:
+            self.speaker_embeddings[meeting_id] = np.vstack(
+                [self.speaker_embeddings[meeting_id], query.astype(np.float16)]
+            )
+        else:
+            self.speaker_embeddings[meeting_id] = query.astype(np.float16).reshape(1, -1)
         return new_speaker_id
     
-    def _cosine_similarity(self, a, b):
-        """Calculate cosine similarity between vectors."""
-        dot = np.dot(a.flatten(), b.flatten())
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
-        return dot / (norm_a * norm_b) if norm_a > 0 and norm_b > 0 else 0
+    def _select_references(self, references, n_segments):
+        """
+        Keep the top-k reference embeddings for a speaker.
+        Scores favour long segments, weighted towards recent ones:
+        phi = duration * (1 + recency_weight * seq / n_segments).
+        """
+        if len(references) <= self.max_references:
+            return references
+        scored = sorted(
+            references,
+            key=lambda ref: ref[1] * (1 + self.recency_weight * ref[2] / n_segments),
+            reverse=True
+        )
+        return scored[:self.max_references]
+    
+    def _center(self, references):
+        """Unit-norm mean of a speaker's reference embeddings."""
+        return self._normalize(np.mean([ref[0] for ref in references], axis=0, dtype=np.float32))
+    
+    @staticmethod
+    def _normalize(vector):
+        """Scale vector to unit L2 norm (zero vectors are left as-is)."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.sqrt(vector @ vector))
+        return vector * (1.0 / norm) if norm > 0 else vector
     
     def _generate_speaker_id(self, features):
         """Generate unique speaker ID from feature hash."""
-        feature_str = np.array2string(features, precision=2)
-        return hashlib.md5(feature_str.encode()).hexdigest()[:12]
+        raw = np.ascontiguousarray(features, dtype=np.float32).tobytes()
+        return hashlib.blake2b(raw, digest_size=6).hexdigest()
     
     def cluster_speakers(self, audio_segments, sr=16000):
         """
         Batch clustering for offline processing.
         Used for post-processing to improve accuracy.
         """
-        embeddings = []
-        valid_segments = []
+        embeddings, valid = self.extract_features_batch(audio_segments, sr)
         
-        for segment in audio_segments:
-            feat = self.extract_features(segment, sr)
-            if feat is not None:
-                embeddings.append(feat)
-                valid_segments.append(segment)
-        
-        if len(embeddings) < 2:
+        if len(valid) < 2:
             return [0] * len(audio_segments)
         
-        embeddings = np.array(embeddings)
-        embeddings = self.scaler.fit_transform(embeddings)
+        # Standardize each feature over the batch (as StandardScaler did) so
+        # the large-magnitude spectral columns do not dominate the distance,
+        # then unit-norm the rows for cosine distance
+        std = embeddings.std(axis=0)
+        embeddings = (embeddings - embeddings.mean(axis=0)) / np.where(std > 0, std, 1)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms > 0, norms, 1)
         
         # Determine optimal clusters (up to 10 speakers)
         n_clusters = min(10, len(embeddings) // 3) if self.n_clusters is None else self.n_clusters
         
-        clustering = AgglomerativeClustering(
-            n_clusters=n_clusters,
-            metric='cosine',
-            linkage='average'
-        )
+        # Condensed cosine distances from one GEMM over the unit-norm rows
+        similarity = embeddings @ embeddings.T
+        upper = np.triu_indices(len(embeddings), k=1)
+        condensed = np.clip(1.0 - similarity[upper], 0.0, None)
         
-        labels = clustering.fit_predict(embeddings)
+        tree = linkage(condensed, method='average')
+        labels = fcluster(tree, t=max(1, n_clusters), criterion='maxclust') - 1
         return labels
\ No newline at end of file
@@ -4,15 +4,27 @@ Assembles transcript, Q&A, decisions into formal meeting minutes.
 """
 
 import json
+import numpy as np
 from datetime import datetime
 from typing import List, Dict, Any
-from collections import defaultdict
+from collections import Counter
+
+from core.qa_engine import QAProcessor
 
 class MinutesBuilder:
     """
     Builds structured meeting minutes from raw data.
     """
     
+    def __init__(self):
+        self._qa = None
+    
+    def _qa_engine(self):
+        """Return the builder's QAProcessor, created on first use."""
+        if self._qa is None:
+            self._qa = QAProcessor()
+        return self._qa
+    
     def build_minutes(self, transcript: List[Dict], qa_pairs: List[Dict], 
                      decisions: List[Dict], action_items: List[Dict]) -> Dict[str, Any]:
         """
@@ -23,21 +35,21 @@ class MinutesBuilder:
         
         # Extract decisions if not provided
         if not decisions:
-            from core.qa_engine import QAProcessor
-            qa_engine = QAProcessor()
-            decisions = qa_engine.extract_decisions(transcript)
+            decisions = self._qa_engine().extract_decisions(transcript)
         
         # Extract action items if not provided
         if not action_items:
-            from core.qa_engine import QAProcessor
-            qa_engine = QAProcessor()
-            action_items = qa_engine.extract_action_items(transcript)
+            action_items = self._qa_engine().extract_action_items(transcript)
+        
+        # One pass over the transcript for timing and counts
+        index = self._compute_transcript_index(transcript)
         
         # Build chronological log
         discussion_log = self._build_discussion_log(transcript)
         
-        # Get unique participants
-        participants = list(set(entry.get('speaker', 'Unknown') for entry in transcript))
+        # Unique participants in order of first appearance; the Counter keys
+        # are exactly that, so no extra pass is needed
+        participants = list(index['speaker_counts'])
         
         minutes = {
             'participants': participants,
@@ -47,7 +59,7 @@ class MinutesBuilder:
                 {
                     'timestamp': d.get('timestamp'),
                     'text': d.get('text') if isinstance(d, dict) else str(d),
-                    'context': self._get_context_for_entry(d, transcript)
+                    'context': self._get_context_for_entry(d, transcript, index['id_to_idx'])
                 } for d in decisions
             ],
             'action_items': [
@@ -58,7 +70,7 @@ class MinutesBuilder:
                     'status': 'Open'
                 } for item in action_items
             ],
-            'summary': self._generate_summary(transcript, len(participants))
+            'summary': self._generate_summary(transcript, len(participants), index)
         }
         
         return minutes
@@ -94,27 +106,67 @@ class MinutesBuilder:
     
     def _categorize_question(self, text: str) -> str:
         """Categorize question by type."""
-        from core.qa_engine import QAProcessor
-        qa = QAProcessor()
-        return qa.extract_question_type(text)
+        return self._qa_engine().extract_question_type(text)
+    
+    def _compute_transcript_index(self, transcript: List[Dict]) -> Dict[str, Any]:
+        """
+        Collect timestamp range, speaker/question counts and entry
+        positions in a single pass over the transcript.
+        """
+        min_ts = None
+        max_ts = None
+        question_count = 0
+        speaker_counts = Counter()
+        id_to_idx = {}
+        
+        for i, entry in enumerate(transcript):
+            entry_id = entry.get('id')
+            if entry_id:
+                id_to_idx.setdefault(entry_id, i)
+            
+            ts = entry.get('timestamp', 0)
+            if ts:
+                if min_ts is None or ts < min_ts:
+                    min_ts = ts
+                if max_ts is None or ts > max_ts:
+                    max_ts = ts
+            
+            speaker_counts[entry.get('speaker', 'Unknown')] += 1
+            
+            if entry.get('is_question'):
+                question_count += 1
+        
+        return {
+            'min_ts': min_ts,
+            'max_ts': max_ts,
+            'speaker_counts': speaker_counts,
+            'question_count': question_count,
+            'id_to_idx': id_to_idx
+        }
     
     def _build_discussion_log(self, transcript: List[Dict]) -> List[Dict]:
         """Build chronological discussion log grouped by topic."""
-        # Group by time periods (every 5 minutes)
-        time_groups = defaultdict(list)
+        if not transcript:
+            return []
         
-        for entry in transcript:
-            ts = entry.get('timestamp', 0)
-            # Convert to minutes bucket
-            bucket = int(ts / 300) * 5  # 5-minute buckets
-            time_groups[bucket].append(entry)
+        # Group by time periods (every 5 minutes), binned in numpy
+        ts = np.fromiter((entry.get('timestamp', 0) for entry in transcript),
+                         dtype=np.float64, count=len(transcript))
+        buckets = np.trunc(ts / 300).astype(np.int64) * 5  # 5-minute buckets
+        
+        # Stable order keeps entries chronological within a bucket; group
+        # boundaries are where the sorted bucket value changes
+        order = np.argsort(buckets, kind='stable')
+        sorted_buckets = buckets[order]
+        bounds = [0] + (np.flatnonzero(np.diff(sorted_buckets)) + 1).tolist() + [len(order)]
+        order = order.tolist()
         
         log = []
-        for time_bucket in sorted(time_groups.keys()):
-            entries = time_groups[time_bucket]
+        for lo, hi in zip(bounds, bounds[1:]):
+            time_bucket = int(sorted_buckets[lo])
             log.append({
                 'time_range': f"{self._format_duration(time_bucket)}-{self._format_duration(time_bucket + 5)}",
-                'entries': entries
+                'entries': [transcript[i] for i in order[lo:hi]]
             })
         
         return log
@@ -125,16 +177,16 @@ class MinutesBuilder:
         mins = minutes % 60
         return f"{hours:02d}:{mins:02d}"
     
-    def _get_context_for_entry(self, entry: Dict, transcript: List[Dict]) -> str:
+    def _get_context_for_entry(self, entry: Dict, transcript: List[Dict],
+                               id_to_idx: Dict[str, int]) -> str:
         """Get surrounding context for a transcript entry."""
         entry_id = entry.get('id')
         if not entry_id:
             return ""
         
         # Find index
-        try:
-            idx = next(i for i, e in enumerate(transcript) if e.get('id') == entry_id)
-        except StopIteration:
+        idx = id_to_idx.get(entry_id)
+        if idx is None:
             return ""
         
         # Get 1 before and 1 after
@@ -147,22 +199,20 @@ class MinutesBuilder:
         
         return ' '.join(context)
     
-    def _generate_summary(self, transcript: List[Dict], num_participants: int) -> Dict:
+    def _generate_summary(self, transcript: List[Dict], num_participants: int,
+                          index: Dict[str, Any]) -> Dict:
         """Generate meeting summary statistics."""
         if not transcript:
             return {}
         
         total_entries = len(transcript)
-        questions = sum(1 for e in transcript if e.get('is_question'))
+        questions = index['question_count']
         
         # Estimate duration from timestamps
-        timestamps = [e.get('timestamp', 0) for e in transcript if e.get('timestamp')]
-        duration = max(timestamps) - min(timestamps) if timestamps else 0
+        duration = index['max_ts'] - index['min_ts'] if index['min_ts'] is not None else 0
         
         # Speaker participation
-        speaker_counts = defaultdict(int)
-        for entry in transcript:
-            speaker_counts[entry.get('speaker', 'Unknown')] += 1
+        speaker_counts = index['speaker_counts']
         
         return {
             'total_entries': total_entries,
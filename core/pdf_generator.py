@@ -5,14 +5,169 @@ Professional, print-ready output.
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Flowable
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from bisect import bisect_right
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any
+from xml.sax.saxutils import escape
 import os
 
+@lru_cache(maxsize=16384)
+def _format_timestamp(ts) -> str:
+    """
+    Format a timestamp as MM:SS. Pure function of ts, so results are
+    cached across Q&A and transcript rows.
+    """
+    if not ts:
+        return "--:--"
+    try:
+        if isinstance(ts, (int, float)):
+            minutes = int(ts / 60)
+            seconds = int(ts % 60)
+            return f"{minutes:02d}:{seconds:02d}"
+        return str(ts)
+    except:
+        return "--:--"
+
+@lru_cache(maxsize=4096)
+def _qa_prefix(kind: str, speaker, time: str) -> str:
+    """Bold 'Q (speaker, time):' markup; a speaker repeats across many rows."""
+    return f"<b>{kind} ({escape(str(speaker))}, {time}):</b> "
+
+class TranscriptLines(Flowable):
+    """
+    Transcript drawn straight onto the canvas.
+    Entries are word-wrapped with font metrics and emitted as text runs,
+    bypassing Paragraph's markup parsing and per-entry layout; Platypus
+    only sees one flowable per page, cut by split().
+    """
+    
+    def __init__(self, entries, style, layout=None, start=0, end=None):
+        Flowable.__init__(self)
+        self.entries = entries  # [(head_runs, body_text)]
+        self.style = style
+        self.layout = layout if layout is not None else {}  # shared by split pieces
+        self.start = start
+        self.end = end
+    
+    def _lines(self, width):
+        """Break entries into lines once; returns (lines, tops)."""
+        if 'lines' not in self.layout:
+            self.layout['lines'], self.layout['tops'] = self._break_lines(width)
+        if self.end is None:
+            self.end = len(self.layout['lines'])
+        return self.layout['lines'], self.layout['tops']
+    
+    def _break_lines(self, width):
+        """
+        Greedy word wrap. lines[i] is a list of (font, text) runs and
+        tops[i]..tops[i+1] the vertical space line i occupies.
+        """
+        font = self.style.fontName
+        size = self.style.fontSize
+        leading = self.style.leading
+        gap = self.style.spaceAfter
+        space_w = stringWidth(' ', font, size)
+        
+        lines = []
+        tops = [0]
+        for head, text in self.entries:
+            runs = list(head)
+            x = sum(stringWidth(s, f, size) for f, s in head)
+            words = []
+            for word in text.split():
+                word_w = stringWidth(word, font, size)
+                advance = word_w + space_w if words else word_w
+                if x + advance <= width:
+                    words.append(word)
+                    x += advance
+                    continue
+                
+                if word_w > width:
+                    # Wider than the frame (a URL, say): break it by
+                    # characters, starting in the room left on this line
+                    room = width - x - (space_w if words else 0)
+                    pieces, word_w = self._split_word(word, room, width, font, size)
+                    if pieces[0]:
+                        words.append(pieces[0])
+                    pieces = pieces[1:]
+                else:
+                    pieces = [word]
+                
+                for piece in pieces:
+                    if words:
+                        runs.append((font, ' '.join(words)))
+                    lines.append(runs)
+                    tops.append(tops[-1] + leading)
+                    runs, words = [], [piece]
+                x = word_w
+            if words:
+                runs.append((font, ' '.join(words)))
+            lines.append(runs)
+            tops.append(tops[-1] + leading + gap)
+        
+        return lines, tops
+    
+    @staticmethod
+    def _split_word(word, first_width, width, font, size):
+        """
+        Break a word into pieces, the first fitting first_width and the rest
+        width. Returns (pieces, width of the last piece).
+        """
+        pieces = []
+        piece, piece_w, limit = '', 0, first_width
+        for ch in word:
+            ch_w = stringWidth(ch, font, size)
+            # A full-width line always takes at least one character
+            if piece_w + ch_w > limit and (piece or limit < width):
+                pieces.append(piece)
+                piece, piece_w, limit = '', 0, width
+            piece += ch
+            piece_w += ch_w
+        pieces.append(piece)
+        return pieces, piece_w
+    
+    def wrap(self, availWidth, availHeight):
+        lines, tops = self._lines(availWidth)
+        self.width = availWidth
+        self.height = tops[self.end] - tops[self.start]
+        return self.width, self.height
+    
+    def split(self, availWidth, availHeight):
+        lines, tops = self._lines(availWidth)
+        # Last line boundary that still fits in the frame
+        cut = bisect_right(tops, tops[self.start] + availHeight, self.start, self.end + 1) - 1
+        if cut <= self.start:
+            return []
+        if cut >= self.end:
+            return [self]
+        return [
+            TranscriptLines(self.entries, self.style, self.layout, self.start, cut),
+            TranscriptLines(self.entries, self.style, self.layout, cut, self.end)
+        ]
+    
+    def draw(self):
+        lines, tops = self.layout['lines'], self.layout['tops']
+        size = self.style.fontSize
+        base = tops[self.start]
+        
+        text = self.canv.beginText()
+        text.setFillColor(self.style.textColor)
+        current_font = None
+        for i in range(self.start, self.end):
+            text.setTextOrigin(0, self.height - (tops[i] - base) - size)
+            for font, s in lines[i]:
+                if font != current_font:
+                    text.setFont(font, size)
+                    current_font = font
+                text.textOut(s)
+        self.canv.drawText(text)
+
 class PDFGenerator:
     """
     Generates professional PDF meeting minutes.
@@ -102,9 +257,11 @@ class PDFGenerator:
     
     def generate(self, meeting_title: str, meeting_date: str, participants: List[str],
                  transcript: List[Dict], qa_pairs: List[Dict], decisions: List[Dict],
-                 action_items: List[Dict], output_path: str):
+                 action_items: List[Dict], output_path: str, duration_minutes: int = None):
         """
         Generate PDF file.
+        duration_minutes may be passed in from the minutes summary to skip
+        rescanning the transcript timestamps.
         """
         doc = SimpleDocTemplate(
             output_path,
@@ -115,15 +272,46 @@ class PDFGenerator:
             bottomMargin=72
         )
         
-        story = []
+        # Build PDF with footer
+        generated_on = datetime.now().strftime('%Y-%m-%d %H:%M')
         
-        # Header
-        story.append(Paragraph(meeting_title, self.styles['MeetingTitle']))
+        def add_footer(canvas, doc):
+            canvas.saveState()
+            footer = Paragraph(
+                f"Page {doc.page} | Generated on {generated_on}",
+                self.styles['Footer']
+            )
+            w, h = footer.wrap(doc.width, doc.bottomMargin)
+            footer.drawOn(canvas, doc.leftMargin, 36)
+            canvas.restoreState()
+        
+        # Platypus indexes, slices and splices the flowable list while laying
+        # out pages, so the generator has to be materialized here.
+        story = list(self._iter_story(meeting_title, meeting_date, participants,
+                                      transcript, qa_pairs, decisions,
+                                      action_items, duration_minutes))
+        doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
+    
+    def _iter_story(self, meeting_title: str, meeting_date: str, participants: List[str],
+                    transcript: List[Dict], qa_pairs: List[Dict], decisions: List[Dict],
+                    action_items: List[Dict], duration_minutes: int = None):
+        """Yield the report flowables section by section."""
+        yield from self._iter_header(meeting_title, meeting_date, participants,
+                                     transcript, duration_minutes)
+        yield from self._iter_participants(participants)
+        yield from self._iter_qa(qa_pairs)
+        yield from self._iter_decisions(decisions)
+        yield from self._iter_action_items(action_items)
+        yield from self._iter_transcript(transcript)
+    
+    def _iter_header(self, meeting_title: str, meeting_date: str, participants: List[str],
+                     transcript: List[Dict], duration_minutes: int = None):
+        """Yield title and metadata table."""
+        yield Paragraph(meeting_title, self.styles['MeetingTitle'])
         
-        # Metadata
         meta_data = [
             ['Date:', meeting_date],
-            ['Duration:', self._calculate_duration(transcript)],
+            ['Duration:', self._calculate_duration(transcript, duration_minutes)],
             ['Participants:', ', '.join(participants[:5]) + ('...' if len(participants) > 5 else '')]
         ]
         
@@ -135,149 +323,157 @@ class PDFGenerator:
             ('VALIGN', (0, 0), (-1, -1), 'TOP'),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
         ]))
-        story.append(meta_table)
-        story.append(Spacer(1, 20))
-        
-        # Participants Section
-        story.append(Paragraph("Participants", self.styles['SectionHeader']))
+        yield meta_table
+        yield Spacer(1, 20)
+    
+    def _iter_participants(self, participants: List[str]):
+        """Yield participants section."""
+        entry_style = self.styles['TranscriptEntry']
+        yield Paragraph("Participants", self.styles['SectionHeader'])
         for participant in participants:
-            story.append(Paragraph(f"• {participant}", self.styles['TranscriptEntry']))
-        story.append(Spacer(1, 20))
+            yield Paragraph(f"• {participant}", entry_style)
+        yield Spacer(1, 20)
+    
+    def _iter_qa(self, qa_pairs: List[Dict]):
+        """Yield Q&A section."""
+        if not qa_pairs:
+            return
+        
+        question_style = self.styles['QuestionStyle']
+        answer_style = self.styles['AnswerStyle']
         
-        # Q&A Section
-        if qa_pairs:
-            story.append(Paragraph("Questions & Answers", self.styles['SectionHeader']))
-            for qa in qa_pairs:
-                q = qa.get('question', {})
-                q_text = q.get('text', '')
-                q_speaker = q.get('asked_by', 'Unknown')
-                q_time = self._format_timestamp(q.get('timestamp'))
+        yield Paragraph("Questions & Answers", self.styles['SectionHeader'])
+        for qa in qa_pairs:
+            q = qa.get('question', {})
+            q_text = q.get('text', '')
+            q_speaker = q.get('asked_by', 'Unknown')
+            q_time = self._format_timestamp(q.get('timestamp'))
+            
+            yield Paragraph(
+                _qa_prefix('Q', q_speaker, q_time) + escape(str(q_text)),
+                question_style
+            )
+            
+            for ans in qa.get('answers', []):
+                ans_text = ans.get('text', '')
+                ans_speaker = ans.get('speaker', 'Unknown')
+                ans_time = self._format_timestamp(ans.get('timestamp'))
                 
-                question_para = Paragraph(
-                    f"<b>Q ({q_speaker}, {q_time}):</b> {q_text}",
-                    self.styles['QuestionStyle']
+                yield Paragraph(
+                    _qa_prefix('A', ans_speaker, ans_time) + escape(str(ans_text)),
+                    answer_style
                 )
-                story.append(question_para)
-                
-                for ans in qa.get('answers', []):
-                    ans_text = ans.get('text', '')
-                    ans_speaker = ans.get('speaker', 'Unknown')
-                    ans_time = self._format_timestamp(ans.get('timestamp'))
-                    
-                    answer_para = Paragraph(
-                        f"<b>A ({ans_speaker}, {ans_time}):</b> {ans_text}",
-                        self.styles['AnswerStyle']
-                    )
-                    story.append(answer_para)
-                
-                story.append(Spacer(1, 10))
             
-            story.append(PageBreak())
+            yield Spacer(1, 10)
         
-        # Decisions Section
-        if decisions:
-            story.append(Paragraph("Decisions Made", self.styles['SectionHeader']))
-            for i, decision in enumerate(decisions, 1):
-                if isinstance(decision, dict):
-                    text = decision.get('text', '')
-                    speaker = decision.get('speaker', 'Unknown')
-                else:
-                    text = str(decision)
-                    speaker = 'Unknown'
-                
-                story.append(Paragraph(
-                    f"{i}. <b>{speaker}:</b> {text}",
-                    self.styles['TranscriptEntry']
-                ))
-            story.append(Spacer(1, 20))
+        yield PageBreak()
+    
+    def _iter_decisions(self, decisions: List[Dict]):
+        """Yield decisions section."""
+        if not decisions:
+            return
         
-        # Action Items Section
-        if action_items:
-            story.append(Paragraph("Action Items", self.styles['SectionHeader']))
-            
-            action_data = [['#', 'Task', 'Assigned To', 'Status']]
-            for i, item in enumerate(action_items, 1):
-                action_data.append([
-                    str(i),
-                    item.get('task', '')[:50] + '...' if len(item.get('task', '')) > 50 else item.get('task', ''),
-                    item.get('assigned_to', 'Unassigned'),
-                    item.get('status', 'Open')
-                ])
+        entry_style = self.styles['TranscriptEntry']
+        
+        yield Paragraph("Decisions Made", self.styles['SectionHeader'])
+        for i, decision in enumerate(decisions, 1):
+            if isinstance(decision, dict):
+                text = decision.get('text', '')
+                speaker = decision.get('speaker', 'Unknown')
+            else:
+                text = str(decision)
+                speaker = 'Unknown'
             
-            action_table = Table(action_data, colWidths=[0.3*inch, 3*inch, 1.2*inch, 0.7*inch])
-            action_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
-                ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            story.append(action_table)
-            story.append(Spacer(1, 20))
+            yield Paragraph(f"{i}. <b>{speaker}:</b> {text}", entry_style)
+        yield Spacer(1, 20)
+    
+    def _iter_action_items(self, action_items: List[Dict]):
+        """Yield action items table."""
+        if not action_items:
+            return
+        
+        yield Paragraph("Action Items", self.styles['SectionHeader'])
+        
+        action_data = [['#', 'Task', 'Assigned To', 'Status']]
+        for i, item in enumerate(action_items, 1):
+            action_data.append([
+                str(i),
+                item.get('task', '')[:50] + '...' if len(item.get('task', '')) > 50 else item.get('task', ''),
+                item.get('assigned_to', 'Unassigned'),
+                item.get('status', 'Open')
+            ])
         
-        # Transcript Section
-        story.append(PageBreak())
-        story.append(Paragraph("Full Transcript", self.styles['SectionHeader']))
+        action_table = Table(action_data, colWidths=[0.3*inch, 3*inch, 1.2*inch, 0.7*inch])
+        action_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 6),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ]))
+        yield action_table
+        yield Spacer(1, 20)
+    
+    def _iter_transcript(self, transcript: List[Dict]):
+        """Yield full transcript section."""
+        entry_style = self.styles['TranscriptEntry']
+        bold = 'Helvetica-Bold'
+        
+        yield PageBreak()
+        yield Paragraph("Full Transcript", self.styles['SectionHeader'])
         
+        # Plain text runs, so no escaping or markup parsing is needed
+        entries = []
         for entry in transcript:
-            speaker = entry.get('speaker', 'Unknown')
-            text = entry.get('text', '')
+            speaker = str(entry.get('speaker', 'Unknown'))
+            text = str(entry.get('text', ''))
             ts = self._format_timestamp(entry.get('timestamp'))
             is_q = entry.get('is_question', False)
             
-            prefix = "<b>Q:</b> " if is_q else ""
-            entry_text = f"<b>{speaker}</b> <i>({ts})</i>: {prefix}{text}"
-            
-            story.append(Paragraph(entry_text, self.styles['TranscriptEntry']))
-        
-        # Build PDF with footer
-        def add_footer(canvas, doc):
-            canvas.saveState()
-            footer = Paragraph(
-                f"Page {doc.page} | Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                self.styles['Footer']
-            )
-            w, h = footer.wrap(doc.width, doc.bottomMargin)
-            footer.drawOn(canvas, doc.leftMargin, 36)
-            canvas.restoreState()
+            head = [(bold, speaker), (entry_style.fontName, ' '),
+                    ('Helvetica-Oblique', f"({ts})"), (entry_style.fontName, ': ')]
+            if is_q:
+                head.append((bold, 'Q: '))
+            entries.append((head, text))
         
-        doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
+        if entries:
+            yield TranscriptLines(entries, entry_style)
     
     def _format_timestamp(self, ts) -> str:
         """Format timestamp for display."""
-        if not ts:
-            return "--:--"
-        try:
-            if isinstance(ts, (int, float)):
-                minutes = int(ts / 60)
-                seconds = int(ts % 60)
-                return f"{minutes:02d}:{seconds:02d}"
-            return str(ts)
-        except:
-            return "--:--"
+        return _format_timestamp(ts)
     
-    def _calculate_duration(self, transcript: List[Dict]) -> str:
+    def _calculate_duration(self, transcript: List[Dict], minutes: int = None) -> str:
         """Calculate meeting duration from transcript."""
         if not transcript:
             return "Unknown"
         
-        timestamps = [e.get('timestamp', 0) for e in transcript if e.get('timestamp')]
-        if not timestamps:
-            return "Unknown"
+        if minutes is None:
+            # Transcript is in time order (chunks of a meeting are ingested
+            # in arrival order), so the ends bound the timestamps
+            first = next((e['timestamp'] for e in transcript if e.get('timestamp')), None)
+            if first is None:
+                return "Unknown"
+            last = next(e['timestamp'] for e in reversed(transcript) if e.get('timestamp'))
+            
+            duration_sec = last - first
+            minutes = int(duration_sec / 60)
         
-        duration_sec = max(timestamps) - min(timestamps)
-        minutes = int(duration_sec / 60)
         hours = minutes // 60
         mins = minutes % 60
         
         if hours > 0:
             return f"{hours}h {mins}m"
-        return f"{mins}m"
\ No newline at end of file
+        return f"{mins}m"
+
+def generate_pdf(**kwargs):
+    """Build a minutes PDF with a fresh PDFGenerator; process-pool entry point."""
+    PDFGenerator().generate(**kwargs)
\ No newline at end of file
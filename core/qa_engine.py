@@ -4,69 +4,109 @@ Uses linguistic patterns and context analysis.
 """
 
 import re
+from functools import lru_cache
 from typing import List, Dict, Any
 
+def _combine(patterns):
+    """
+    Compile patterns into one alternation with a named group per pattern,
+    so a single search replaces one search per pattern.
+    match.lastgroup ('p0', 'p1', ...) tells which pattern fired.
+    """
+    return re.compile('|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(patterns)))
+
+@lru_cache(maxsize=4096)
+def _tokens(text):
+    """
+    Lowercased, stripped text and its word tuple, cached across calls.
+    The same transcript line goes through is_question, is_conclusive_answer
+    and both extractors, so it is only lowered and split once.
+    """
+    text_lower = text.lower().strip()
+    return text_lower, tuple(text_lower.split())
+
+@lru_cache(maxsize=4096)
+def _word_set(text):
+    """Tokenized word set of a (lowercased) text, cached across calls."""
+    return frozenset(text.split())
+
 class QAProcessor:
     """
     Automatically detects questions and links answers.
     No training required - rule-based with heuristics.
     """
     
+    # Regex patterns are compiled once at class load and shared by all instances
+    # Conclusive answer patterns
+    _conclusive_re = _combine((
+        r'^(yes|no|sure|absolutely|certainly|definitely)\b',
+        r'(agreed|confirmed|approved|accepted|decided)\b',
+        r'(will do|i\'ll handle|i\'ll take care|assigned to)\b'
+    ))
+    
+    _decision_re = _combine((
+        r'(we|i|team|group)\s+(have\s+)?(decided|agreed|resolved|concluded)',
+        r'(decision|resolution|conclusion)\s+(is|was)',
+        r'(moving forward|going forward|from now on)',
+        r'(will|shall)\s+(be|use|implement|adopt)',
+        r'let\'s\s+(go with|use|choose|select)',
+    ))
+    
+    _action_re = _combine((
+        r'(i will|i\'ll|we will|we\'ll)\s+(.+)',
+        r'(need to|needs to|have to|has to)\s+(.+)',
+        r'(action item|todo|to-do|task)',
+        r'(follow up|followup|check on|review)',
+        r'(schedule|set up|arrange|organize)\s+(a|an)?\s*(meeting|call|review)',
+    ))
+    
+    # Common names; an "i/we will" item falls back to the speaker anyway
+    _names_re = re.compile(r'\b(john|jane|alex|sarah|mike|emily|chris|lisa|david|anna)\b')
+    
     def __init__(self):
         # Question indicators
-        self.question_starters = [
+        self.question_starters = frozenset([
             'what', 'why', 'how', 'when', 'where', 'who', 'which',
             'whom', 'whose', 'is', 'are', 'was', 'were', 'do', 'does',
             'did', 'can', 'could', 'would', 'should', 'will', 'shall',
             'have', 'has', 'had', 'am', 'may', 'might', 'must'
-        ]
+        ])
         
-        self.question_patterns = [
-            r'^(what|why|how|when|where|who|which)\s',
-            r'^(is|are|was|were|do|does|did|can|could|would|should)\s',
-            r'\?$',  # Ends with question mark
-            r'^(can you|could you|would you|will you|did you)\s',
-            r'^(has anyone|have you|is there|are there)\s',
-        ]
+        # Auxiliary verbs for inversion checks
+        self.aux_verbs = frozenset([
+            'is', 'are', 'was', 'were', 'do', 'does', 'did', 'have', 'has',
+            'had', 'can', 'could', 'would', 'should'
+        ])
         
-        # Answer indicators
-        self.answer_starters = [
+        # Answer indicators (tuple so str.startswith tests them in one call)
+        self.answer_starters = (
             'yes', 'no', 'sure', 'absolutely', 'definitely',
             'i think', 'in my opinion', 'according to',
             'the reason', 'because', 'since', 'as', 'therefore'
-        ]
-        
-        # Conclusive answer patterns
-        self.conclusive_patterns = [
-            r'^(yes|no|sure|absolutely|certainly|definitely)\b',
-            r'(agreed|confirmed|approved|accepted|decided)\b',
-            r'(will do|i\'ll handle|i\'ll take care|assigned to)\b'
-        ]
+        )
     
     def is_question(self, text: str) -> bool:
         """
         Determine if text is a question using multiple heuristics.
         """
-        text_lower = text.lower().strip()
+        text_lower, words = _tokens(text)
         
         # Check for question mark
         if text.endswith('?'):
             return True
         
         # Check question starters
-        words = text_lower.split()
         if words and words[0] in self.question_starters:
             return True
         
-        # Check patterns
-        for pattern in self.question_patterns:
-            if re.search(pattern, text_lower):
-                return True
+        # Question mark hidden behind trailing whitespace; every leading-word
+        # pattern (what/is/can you/has anyone...) is covered by the starters
+        if text_lower.endswith('?'):
+            return True
         
         # Structural heuristics
         # Inversion patterns (auxiliary verb before subject)
-        aux_verbs = ['is', 'are', 'was', 'were', 'do', 'does', 'did', 'have', 'has', 'had', 'can', 'could', 'would', 'should']
-        if len(words) >= 2 and words[0] in aux_verbs:
+        if len(words) >= 2 and words[0] in self.aux_verbs:
             return True
         
         return False
@@ -75,15 +115,13 @@ class QAProcessor:
         """
         Determine if text is likely an answer to a question.
         """
-        text_lower = text.lower().strip()
+        text_lower, words = _tokens(text)
         
         # Direct answers
-        for starter in self.answer_starters:
-            if text_lower.startswith(starter):
-                return True
+        if text_lower.startswith(self.answer_starters):
+            return True
         
         # Check if it provides information (declarative statement)
-        words = text_lower.split()
         if len(words) > 3 and not self.is_question(text):
             return True
         
@@ -94,11 +132,10 @@ class QAProcessor:
         Determine if answer resolves the question definitively.
         Used to mark Q&A pair as resolved.
         """
-        text_lower = text.lower().strip()
+        text_lower, _ = _tokens(text)
         
-        for pattern in self.conclusive_patterns:
-            if re.search(pattern, text_lower):
-                return True
+        if self._conclusive_re.search(text_lower):
+            return True
         
         # Check for action items or decisions
         if any(word in text_lower for word in ['will', 'schedule', 'set up', 'follow up', 'deadline']):
@@ -110,7 +147,7 @@ class QAProcessor:
         """
         Categorize question type for better organization.
         """
-        text_lower = text.lower()
+        text_lower, _ = _tokens(text)
         
         if any(w in text_lower for w in ['what', 'which']):
             return ' clarification'
@@ -135,57 +172,38 @@ class QAProcessor:
         if not open_questions:
             return -1
         
-        answer_text = answer.get('text', '').lower()
+        answer_text, answer_tokens = _tokens(answer.get('text', ''))
+        answer_words = set(answer_tokens)
+        n_questions = len(open_questions)
         
-        # Score each open question for relevance
-        scores = []
-        for i, q in enumerate(open_questions):
-            question_text = q.get('text', '').lower()
-            score = 0
-            
-            # Word overlap
-            answer_words = set(answer_text.split())
-            question_words = set(question_text.split())
-            overlap = len(answer_words & question_words)
-            score += overlap
-            
-            # Proximity in time (handled by caller, but we weight recent higher)
-            score += (len(open_questions) - i) * 0.5
-            
-            # Contextual clues
-            if any(word in answer_text for word in ['it', 'that', 'this', 'they']):
-                score += 2  # Pronoun reference likely refers to recent question
-            
-            scores.append((i, score))
+        # Contextual clues: pronoun reference likely refers to recent question
+        pronoun_bonus = 2 if any(word in answer_text for word in ['it', 'that', 'this', 'they']) else 0
+        
+        # Score each open question for relevance: word overlap plus
+        # proximity in time (handled by caller, but we weight recent higher)
+        scores = [
+            len(answer_words & _word_set(q.get('text', '').lower())) + (n_questions - i) * 0.5 + pronoun_bonus
+            for i, q in enumerate(open_questions)
+        ]
         
         # Return highest scoring question
-        if scores:
-            best = max(scores, key=lambda x: x[1])
-            if best[1] > 0:
-                return best[0]
+        best = max(range(n_questions), key=scores.__getitem__)
+        if scores[best] > 0:
+            return best
         
         # Default to most recent
-        return len(open_questions) - 1 if open_questions else -1
+        return n_questions - 1
     
     def extract_decisions(self, transcript: List[Dict[str, Any]]) -> List[str]:
         """
         Extract potential decisions from transcript.
         """
         decisions = []
-        decision_patterns = [
-            r'(we|i|team|group)\s+(have\s+)?(decided|agreed|resolved|concluded)',
-            r'(decision|resolution|conclusion)\s+(is|was)',
-            r'(moving forward|going forward|from now on)',
-            r'(will|shall)\s+(be|use|implement|adopt)',
-            r'let\'s\s+(go with|use|choose|select)',
-        ]
         
         for entry in transcript:
-            text = entry.get('text', '').lower()
-            for pattern in decision_patterns:
-                if re.search(pattern, text):
-                    decisions.append(entry)
-                    break
+            text, _ = _tokens(entry.get('text', ''))
+            if self._decision_re.search(text):
+                decisions.append(entry)
         
         return decisions
     
@@ -194,43 +212,23 @@ class QAProcessor:
         Extract action items from transcript.
         """
         action_items = []
-        action_patterns = [
-            r'(i will|i\'ll|we will|we\'ll)\s+(.+)',
-            r'(need to|needs to|have to|has to)\s+(.+)',
-            r'(action item|todo|to-do|task)',
-            r'(follow up|followup|check on|review)',
-            r'(schedule|set up|arrange|organize)\s+(a|an)?\s*(meeting|call|review)',
-        ]
-        
-        responsible_patterns = [
-            r'(john|jane|alex|sarah|mike|emily|chris|lisa|david|anna)',  # Common names
-            r'(i|we)\s+will',
-        ]
         
         for entry in transcript:
-            text = entry.get('text', '').lower()
+            text, _ = _tokens(entry.get('text', ''))
             speaker = entry.get('speaker', 'Unknown')
             
-            for pattern in action_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    # Try to find who is responsible
-                    responsible = speaker
-                    for resp_pattern in responsible_patterns:
-                        resp_match = re.search(resp_pattern, text)
-                        if resp_match:
-                            if resp_match.group(1) in ['i', 'we']:
-                                responsible = speaker
-                            else:
-                                responsible = resp_match.group(1).title()
-                            break
-                    
-                    action_items.append({
-                        'text': entry['text'],
-                        'assigned_to': responsible,
-                        'timestamp': entry.get('timestamp'),
-                        'speaker': speaker
-                    })
-                    break
+            if not self._action_re.search(text):
+                continue
+            
+            # Try to find who is responsible
+            name_match = self._names_re.search(text)
+            responsible = name_match.group(1).title() if name_match else speaker
+            
+            action_items.append({
+                'text': entry['text'],
+                'assigned_to': responsible,
+                'timestamp': entry.get('timestamp'),
+                'speaker': speaker
+            })
         
         return action_items
\ No newline at end of file
@@ -4,25 +4,148 @@ Self-hosted, no API keys required.
 """
 
 import os
-import json
-import wave
-import io
+import orjson
+import struct
+import tempfile
+import threading
+import queue
 from vosk import Model, KaldiRecognizer
+from cffi import FFI
 import numpy as np
 
-class OfflineTranscriber:
+_ffi = FFI()
+
+# Samples converted per pass in to_int16 (64 KB of float32 scratch)
+_CONVERT_BLOCK = 16384
+
+# RIFF/WAVE header for _numpy_to_wav
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Chunks whose samples all stay within this peak (about -50 dBFS) are
+# silence and skipped by transcribe
+_SILENCE_PEAK = 100
+
+# Chunks transcribe_stream converts ahead of the decoder
+_STREAM_PREFETCH = 4
+
+# How Vosk renders a result with no recognized text
+_EMPTY_RESULTS = ('"text" : ""', '"text": ""')
+_EMPTY_PARTIALS = ('"partial" : ""', '"partial": ""')
+
+# Loaded models by path, shared by every OfflineTranscriber; a Model is
+# read-only once loaded and recognizers on any thread can use the same one
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
+def _parse_result(raw):
+    """
+    Parse a Vosk result JSON. Returns None for an empty result without
+    building a dict, which is most results when the audio is silent.
+    """
+    if any(empty in raw for empty in _EMPTY_RESULTS):
+        return None
+    return orjson.loads(raw)
+
+def _parse_partial(raw):
+    """Text of a Vosk PartialResult JSON, '' when nothing is pending."""
+    if any(empty in raw for empty in _EMPTY_PARTIALS):
+        return ''
+    return orjson.loads(raw).get('partial', '')
+
+class BaseTranscriber:
+    """
+    Audio conversion shared by the speech-to-text backends.
+    """
+    
+    def to_int16(self, audio_data, out=None):
+        """
+        Convert float audio in [-1, 1] to 16-bit samples; int16 input is
+        passed through as is.
+        Out-of-range samples are clipped rather than wrapped around, and
+        values are rounded rather than truncated. The work runs block by
+        block through a small float32 temporary that stays in cache, so a
+        long clip never gets a full-size float copy. Strided input (e.g.
+        one channel of interleaved stereo) is read in place, and the
+        result is always C-contiguous. Pass out to reuse an int16 buffer.
+        """
+        audio_data = np.asarray(audio_data)
+        if audio_data.ndim != 1:
+            audio_data = audio_data.reshape(-1)
+        
+        # Already 16-bit PCM (e.g. straight from the decoder): nothing to scale
+        if audio_data.dtype == np.int16:
+            if out is None:
+                return np.ascontiguousarray(audio_data)
+            np.copyto(out, audio_data)
+            return out
+        
+        n = audio_data.shape[0]
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        
+        tmp = np.empty(min(n, _CONVERT_BLOCK), dtype=np.float32)
+        for start in range(0, n, _CONVERT_BLOCK):
+            block = audio_data[start:start + _CONVERT_BLOCK]
+            scaled = tmp[:block.shape[0]]
+            np.multiply(block, 32767.0, out=scaled, dtype=np.float32)
+            np.clip(scaled, -32767.0, 32767.0, out=scaled)
+            np.rint(scaled, out=scaled)
+            np.copyto(out[start:start + _CONVERT_BLOCK], scaled, casting='unsafe')
+        return out
+    
+    def _numpy_to_pcm16(self, audio_data, out=None):
+        """
+        Convert numpy array to raw 16-bit PCM, returned as a byte
+        memoryview over the int16 samples (no header, no extra copy).
+        """
+        return memoryview(self.to_int16(audio_data, out=out)).cast('B')
+    
+    def _numpy_to_wav(self, audio_data, sample_rate):
+        """Convert numpy array to WAV bytes, for exporting audio to a file."""
+        # Ensure int16 format (little-endian, as WAV requires)
+        audio_int16 = self.to_int16(audio_data).astype('<i2', copy=False)
+        n = audio_int16.nbytes
+        
+        # Canonical 44-byte mono 16-bit PCM header, then the samples, written
+        # into one preallocated buffer
+        buf = bytearray(_WAV_HEADER.size + n)
+        _WAV_HEADER.pack_into(
+            buf, 0,
+            b'RIFF', 36 + n, b'WAVE',
+            b'fmt ', 16, 1, 1,  # PCM, mono
+            sample_rate, sample_rate * 2, 2, 16,
+            b'data', n
+        )
+        memoryview(buf)[_WAV_HEADER.size:] = memoryview(audio_int16).cast('B')
+        
+        return bytes(buf)
+
+class OfflineTranscriber(BaseTranscriber):
     """
     Offline speech recognition using Vosk.
     Loads model once, processes audio chunks.
     """
     
+    # First model location found on disk, shared by all instances
+    _default_model_path = None
+    
     def __init__(self, model_path=None):
         self.model_path = model_path or self._get_default_model_path()
         self.model = None
+        # Per-thread {sample_rate: KaldiRecognizer}; a recognizer holds
+        # decoder state, so concurrent ingest threads must not share one
+        self._local = threading.local()
         self._load_model()
     
     def _get_default_model_path(self):
-        """Get default model path."""
+        """
+        Get default model path.
+        A location that exists is remembered, so later instances skip the
+        probes; a miss is not, so a model downloaded afterwards is found.
+        """
+        if OfflineTranscriber._default_model_path is not None:
+            return OfflineTranscriber._default_model_path
+        
         # Check common locations
         paths = [
             "models/vosk-model-en-us-0.22",
@@ -31,18 +154,28 @@ class OfflineTranscriber:
         ]
         for path in paths:
             if os.path.exists(path):
+                OfflineTranscriber._default_model_path = path
                 return path
         return paths[0]  # Default fallback
     
     def _load_model(self):
-        """Load Vosk model."""
+        """Load Vosk model, reusing one already loaded from the same path."""
         try:
-            if not os.path.exists(self.model_path):
-                print(f"Model not found at {self.model_path}, downloading...")
-                self._download_model()
+            # Held across the load so concurrent constructors wait for the
+            # first one instead of each loading a copy
+            with _MODEL_LOCK:
+                model = _MODEL_CACHE.get(self.model_path)
+                if model is None:
+                    if not os.path.exists(self.model_path):
+                        print(f"Model not found at {self.model_path}, downloading...")
+                        self._download_model()
+                    
+                    model = _MODEL_CACHE.get(self.model_path)
+                    if model is None:
+                        model = _MODEL_CACHE[self.model_path] = Model(self.model_path)
+                        print("Vosk model loaded successfully")
             
-            self.model = Model(self.model_path)
-            print("Vosk model loaded successfully")
+            self.model = model
         except Exception as e:
             print(f"Error loading model: {e}")
             raise
@@ -52,98 +185,278 @@ class OfflineTranscriber:
         Download model if not present.
         In production, model should be included in deployment package.
         """
+        import shutil
         import urllib.request
         import zipfile
         
         model_url = "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip"
-        zip_path = "/tmp/vosk-model.zip"
-        
-        print(f"Downloading model from {model_url}...")
-        urllib.request.urlretrieve(model_url, zip_path)
+        # Unique name so concurrent workers do not overwrite each other's download
+        fd, zip_path = tempfile.mkstemp(prefix='vosk-model-', suffix='.zip')
+        os.close(fd)
         
-        print("Extracting model...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall("/tmp/models/")
+        try:
+            print(f"Downloading model from {model_url}...")
+            # Stream to disk in 1 MB blocks rather than urlretrieve's 8 KB
+            with urllib.request.urlopen(model_url) as response, open(zip_path, 'wb') as f:
+                shutil.copyfileobj(response, f, length=1 << 20)
+            
+            print("Extracting model...")
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                zip_ref.extractall("/tmp/models/")
+        finally:
+            os.remove(zip_path)
         
-        os.remove(zip_path)
         self.model_path = "/tmp/models/vosk-model-en-us-0.22"
+        OfflineTranscriber._default_model_path = self.model_path
     
-    def transcribe(self, audio_data, sample_rate=16000):
+    def transcribe(self, audio_data, sample_rate=16000, chunk_samples=32768):
         """
         Transcribe audio numpy array to text.
         Returns transcribed string.
+        Callers done with their float samples can pass to_int16(audio)
+        instead, keeping only 2 bytes/sample alive during the decode.
+        chunk_samples is the number of samples per AcceptWaveform call; the
+        whole clip is already in hand, so large chunks cut per-call overhead
+        at no latency cost.
         """
         if self.model is None:
             raise RuntimeError("Model not loaded")
         
-        # Convert numpy array to WAV format bytes
-        wav_bytes = self._numpy_to_wav(audio_data, sample_rate)
+        # Vosk takes raw little-endian 16-bit PCM, so no WAV container is needed
+        samples = self.to_int16(audio_data)
+        pcm = memoryview(samples).cast('B')
+        # Only the PCM is needed from here on; once the caller has let go of
+        # its float array too, it can be freed before the decode starts
+        del audio_data
         
         # Process with Vosk
-        recognizer = KaldiRecognizer(self.model, sample_rate)
-        recognizer.SetWords(True)
+        recognizer = self._get_recognizer(sample_rate)
         
         results = []
         
-        # Process in chunks to simulate streaming
-        chunk_size = 4096
-        offset = 44  # Skip WAV header
+        # Process in chunks to simulate streaming. Chunk boundaries and the
+        # silence test are computed for all chunks at once in numpy, so the
+        # Python loop only runs for chunks that actually get decoded.
+        starts = np.arange(0, len(samples), chunk_samples)
+        if len(starts):
+            # Near-silent chunks cannot produce text; skip decoding them
+            loud = ((np.maximum.reduceat(samples, starts) >= _SILENCE_PEAK) |
+                    (np.minimum.reduceat(samples, starts) <= -_SILENCE_PEAK))
+            starts = starts[loud]
         
-        while offset < len(wav_bytes):
-            chunk = wav_bytes[offset:offset + chunk_size]
+        for start in starts.tolist():
+            # Slicing the view does not copy; vosk's cffi binding takes a
+            # bytes object or a cdata pointer, so wrap the slice as the latter
+            chunk = _ffi.from_buffer(pcm[start * 2:(start + chunk_samples) * 2])
             if recognizer.AcceptWaveform(chunk):
-                result = json.loads(recognizer.Result())
-                if result.get('text'):
+                result = _parse_result(recognizer.Result())
+                if result and result.get('text'):
                     results.append(result['text'])
-            offset += chunk_size
         
         # Get final result
-        final_result = json.loads(recognizer.FinalResult())
-        if final_result.get('text'):
+        final_result = _parse_result(recognizer.FinalResult())
+        if final_result and final_result.get('text'):
             results.append(final_result['text'])
         
         return ' '.join(results).strip()
     
-    def _numpy_to_wav(self, audio_data, sample_rate):
-        """Convert numpy array to WAV bytes."""
-        # Ensure int16 format
-        audio_int16 = (audio_data * 32767).astype(np.int16)
+    def _get_recognizer(self, sample_rate):
+        """
+        Return this thread's recognizer for sample_rate, reset for a new
+        utterance. Building one allocates the decoder, so it is kept.
+        """
+        recognizers = getattr(self._local, 'recognizers', None)
+        if recognizers is None:
+            recognizers = self._local.recognizers = {}
         
-        # Create WAV file in memory
-        byte_io = io.BytesIO()
+        recognizer = recognizers.get(sample_rate)
+        if recognizer is None:
+            recognizer = recognizers[sample_rate] = KaldiRecognizer(self.model, sample_rate)
+            recognizer.SetWords(True)
+        else:
+            recognizer.Reset()
+        return recognizer
+    
+    def _iter_pcm(self, audio_generator):
+        """
+        Yield int16 PCM views of the generator's chunks, pulled and
+        converted on the calling thread into one reused scratch buffer.
+        """
+        buffer = np.empty(0, dtype=np.int16)
+        for audio_chunk in audio_generator:
+            n = len(audio_chunk)
+            if len(buffer) < n:
+                buffer = np.empty(n, dtype=np.int16)
+            yield self._numpy_to_pcm16(audio_chunk, out=buffer[:n])
+    
+    def _prefetch_pcm(self, audio_generator):
+        """
+        Yield int16 PCM views of the generator's chunks, pulling and
+        converting them on a producer thread. AcceptWaveform releases the
+        GIL, so reading/converting the next chunks overlaps with decoding
+        the current one. audio_generator runs on that thread, not the
+        caller's.
+        """
+        chunks = queue.Queue(maxsize=_STREAM_PREFETCH)
+        stop = threading.Event()
         
-        with wave.open(byte_io, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_int16.tobytes())
+        def put(item):
+            # Give up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
         
-        return byte_io.getvalue()
+        def produce():
+            # Queued chunks, the one being decoded and the one being filled
+            # each need their own scratch buffer
+            buffers = [np.empty(0, dtype=np.int16) for _ in range(_STREAM_PREFETCH + 2)]
+            try:
+                for i, audio_chunk in enumerate(audio_generator):
+                    slot = i % len(buffers)
+                    n = len(audio_chunk)
+                    if len(buffers[slot]) < n:
+                        buffers[slot] = np.empty(n, dtype=np.int16)
+                    if not put(self._numpy_to_pcm16(audio_chunk, out=buffers[slot][:n])):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                pcm = chunks.get()
+                if pcm is None:
+                    return
+                if isinstance(pcm, Exception):
+                    raise pcm
+                yield pcm
+        finally:
+            stop.set()
     
-    def transcribe_stream(self, audio_generator):
+    def transcribe_stream(self, audio_generator, prefetch=False):
         """
         Stream transcription for real-time processing.
-        Yields partial results.
+        Yields partial results per completed utterance, and 'interim'
+        hypotheses for the utterance in progress whenever they change.
+        With prefetch, audio_generator is consumed on a background thread
+        so reading the next chunks overlaps decoding; only use it for
+        generators that do not rely on the calling thread's state (a Flask
+        stream_with_context generator, for one, does).
         """
+        # No SetWords: only the text is streamed, and word timings make
+        # every result payload several times larger
         recognizer = KaldiRecognizer(self.model, 16000)
-        recognizer.SetWords(True)
         
-        for audio_chunk in audio_generator:
-            wav_bytes = self._numpy_to_wav(audio_chunk, 16000)
-            
-            if recognizer.AcceptWaveform(wav_bytes[44:]):  # Skip header after first
-                result = json.loads(recognizer.Result())
-                if result.get('text'):
+        last_interim = ''
+        pcm_chunks = self._prefetch_pcm if prefetch else self._iter_pcm
+        for pcm in pcm_chunks(audio_generator):
+            if recognizer.AcceptWaveform(_ffi.from_buffer(pcm)):
+                last_interim = ''
+                result = _parse_result(recognizer.Result())
+                if result and result.get('text'):
                     yield {
                         'type': 'partial',
                         'text': result['text'],
                         'confidence': result.get('confidence', 0)
                     }
+            else:
+                # Cheap {"partial": ...} hypothesis; no word-level detail
+                interim = _parse_partial(recognizer.PartialResult())
+                if interim and interim != last_interim:
+                    last_interim = interim
+                    yield {'type': 'interim', 'text': interim}
         
-        final = json.loads(recognizer.FinalResult())
-        if final.get('text'):
+        final = _parse_result(recognizer.FinalResult())
+        if final and final.get('text'):
             yield {
                 'type': 'final',
                 'text': final['text'],
                 'confidence': final.get('confidence', 0)
-            }
\ No newline at end of file
+            }
+
+class WhisperTranscriber(BaseTranscriber):
+    """
+    Offline speech recognition using faster-whisper (CTranslate2).
+    Drop-in alternative to the Vosk transcriber; int8 weights by default,
+    and the GPU when one is available. Requires the faster-whisper package.
+    """
+    
+    def __init__(self, model_size=None, device='auto', compute_type='int8'):
+        self.model_path = model_size or os.environ.get('WHISPER_MODEL', 'base.en')
+        self.device = device
+        self.compute_type = compute_type
+        self.model = None
+        self._load_model()
+    
+    def _load_model(self):
+        """Load Whisper model, reusing one already loaded with the same settings."""
+        from faster_whisper import WhisperModel
+        
+        key = ('whisper', self.model_path, self.device, self.compute_type)
+        try:
+            with _MODEL_LOCK:
+                model = _MODEL_CACHE.get(key)
+                if model is None:
+                    # Downloads the converted weights on first use
+                    model = _MODEL_CACHE[key] = WhisperModel(
+                        self.model_path,
+                        device=self.device,
+                        compute_type=self.compute_type
+                    )
+                    print("Whisper model loaded successfully")
+            
+            self.model = model
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            raise
+    
+    def to_float32(self, audio_data):
+        """
+        Convert audio to float32 in [-1, 1]. Float input is only cast (not
+        copied when already float32); int16 PCM is scaled down.
+        """
+        audio_data = np.asarray(audio_data)
+        if audio_data.ndim != 1:
+            audio_data = audio_data.reshape(-1)
+        if audio_data.dtype == np.int16:
+            return np.multiply(audio_data, 1.0 / 32768, dtype=np.float32)
+        return audio_data.astype(np.float32, copy=False)
+    
+    def transcribe(self, audio_data, sample_rate=16000, chunk_samples=None):
+        """
+        Transcribe audio numpy array to text.
+        Returns transcribed string. chunk_samples is ignored; Whisper decodes
+        the clip in its own 30 s windows.
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+        
+        # Whisper takes float32 in [-1, 1] at 16 kHz
+        samples = self.to_float32(audio_data)
+        del audio_data
+        if sample_rate != 16000:
+            import librosa
+            samples = librosa.resample(samples, orig_sr=sample_rate, target_sr=16000)
+        
+        # The VAD filter drops silent stretches before decoding
+        segments, _ = self.model.transcribe(samples, vad_filter=True)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+    
+    def transcribe_stream(self, audio_generator, prefetch=False):
+        """
+        Stream transcription. Whisper has no incremental decoder, so the
+        audio is collected and a single final result is yielded; prefetch
+        is accepted for compatibility and ignored.
+        """
+        chunks = [self.to_float32(chunk) for chunk in audio_generator]
+        if not chunks:
+            return
+        
+        text = self.transcribe(np.concatenate(chunks))
+        if text:
+            yield {'type': 'final', 'text': text, 'confidence': 0}